@@ -0,0 +1,106 @@
+"""
+Local stand-in for a WebSub (PubSubHubbub) hub.
+
+Accepts subscription requests, verifies them against the subscriber's
+callback with a challenge, and delivers signed Atom notifications in the
+format YouTube uses when `publish()` is called.
+"""
+import hashlib
+import hmac
+import secrets
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import requests
+
+FEED_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns="http://www.w3.org/2005/Atom">
+  <link rel="hub" href="https://pubsubhubbub.appspot.com"/>
+  <link rel="self" href="{topic}"/>
+  <title>YouTube video feed</title>
+  <entry>
+    <id>yt:video:{video_id}</id>
+    <yt:videoId>{video_id}</yt:videoId>
+    <yt:channelId>{channel_id}</yt:channelId>
+    <title>Live stream</title>
+    <link rel="alternate" href="https://www.youtube.com/watch?v={video_id}"/>
+  </entry>
+</feed>
+"""
+
+
+class FakeHub:
+    """Subscriptions keyed by topic, each with its callback and secret"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = {}
+        self.verified = 0
+        self.delivered = 0
+
+    def handle_request(self, form):
+        mode = form.get('hub.mode')
+        callback = form['hub.callback']
+        topic = form['hub.topic']
+        lease = form.get('hub.lease_seconds', '432000')
+        threading.Thread(
+            target=self._verify,
+            args=(mode, callback, topic, form.get('hub.secret', ''), lease),
+            daemon=True
+        ).start()
+
+    def _verify(self, mode, callback, topic, secret, lease):
+        challenge = secrets.token_hex(8)
+        response = requests.get(callback, params={
+            'hub.mode': mode,
+            'hub.topic': topic,
+            'hub.challenge': challenge,
+            'hub.lease_seconds': lease,
+        }, timeout=10)
+        if response.status_code != 200 or response.text != challenge:
+            return
+        with self.lock:
+            if mode == 'subscribe':
+                self.subscriptions[topic] = (callback, secret)
+            else:
+                self.subscriptions.pop(topic, None)
+            self.verified += 1
+
+    def publish(self, channel_id, video_id):
+        """Deliver a notification about a video to the subscribers of its channel"""
+        topic = f'https://www.youtube.com/xml/feeds/videos.xml?channel_id={channel_id}'
+        with self.lock:
+            subscription = self.subscriptions.get(topic)
+        if subscription is None:
+            return False
+        callback, secret = subscription
+        body = FEED_TEMPLATE.format(topic=topic, video_id=video_id, channel_id=channel_id).encode()
+        signature = hmac.new(secret.encode(), body, hashlib.sha1).hexdigest()
+        requests.post(callback, data=body, headers={
+            'Content-Type': 'application/atom+xml',
+            'X-Hub-Signature': f'sha1={signature}',
+        }, timeout=30)
+        with self.lock:
+            self.delivered += 1
+        return True
+
+
+def serve(hub, host='127.0.0.1', port=0):
+    """Start the fake hub in a background thread and return the server"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+            hub.handle_request(form)
+            self.send_response(202)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
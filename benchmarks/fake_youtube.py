@@ -0,0 +1,278 @@
+"""
+Local stand-in for the parts of the YouTube Data API v3 that LivestreamTrap uses.
+
+Simulates N channels that randomly go live and end their streams, and keeps
+track of the quota units each request would have cost on the real API.
+
+Run standalone:
+
+    python -m benchmarks.fake_youtube --channels 500 --port 8765
+
+and point the application at it with YOUTUBE_API_ENDPOINT=http://127.0.0.1:8765/
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+QUOTA_COSTS = {
+    'search.list': 100,
+    'channels.list': 1,
+    'videos.list': 1,
+}
+
+
+QUOTA_EXCEEDED_ERROR = {
+    'error': {
+        'code': 403,
+        'message': 'The request cannot be completed because you have exceeded your quota.',
+        'errors': [{'domain': 'youtube.quota', 'reason': 'quotaExceeded'}],
+    }
+}
+
+
+class FakeYouTube:
+    """In-memory state of the simulated channels and live streams"""
+
+    def __init__(self, channel_count, live_rate=0.0, end_rate=0.0, latency=0.0, key_quota=None, seed=None):
+        self.random = random.Random(seed)
+        self.key_quota = key_quota
+        self.live_rate = live_rate
+        self.end_rate = end_rate
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.quota = Counter()
+        self.requests = Counter()
+        self.quota_by_key = Counter()
+        self.channels = {}
+        self.live = {}  # video_id -> channel_id
+        self.videos = {}
+        self._video_seq = 0
+        for index in range(channel_count):
+            channel_id = f'UCbench{index:016d}'
+            self.channels[channel_id] = {
+                'handle': handle_for(index),
+                'title': f'Benchmark channel {index}',
+                'subscribers': self.random.randint(100, 5_000_000),
+                'views': self.random.randint(10_000, 500_000_000),
+                'videos': self.random.randint(1, 5_000),
+            }
+
+    def go_live(self, channel_id):
+        """Start a new live stream on a channel and return its video id"""
+        with self.lock:
+            self._video_seq += 1
+            video_id = f'v{self._video_seq:010d}'
+            self.live[video_id] = channel_id
+            self.videos[video_id] = {
+                'channel_id': channel_id,
+                'title': f'Live stream {self._video_seq} of {self.channels[channel_id]["title"]}',
+                'started': time.time(),
+                'ended': None,
+            }
+            return video_id
+
+    def end(self, video_id):
+        with self.lock:
+            self.live.pop(video_id, None)
+            if video_id in self.videos:
+                self.videos[video_id]['ended'] = time.time()
+
+    def tick(self):
+        """Randomly start and end streams according to the configured rates"""
+        for channel_id in list(self.channels):
+            if self.random.random() < self.live_rate:
+                self.go_live(channel_id)
+        for video_id in list(self.live):
+            if self.random.random() < self.end_rate:
+                self.end(video_id)
+
+    def charge(self, method, key=None):
+        """Count a request; returns False when the key's simulated quota is used up"""
+        units = QUOTA_COSTS.get(method, 1)
+        with self.lock:
+            if self.key_quota is not None and self.quota_by_key[key] + units > self.key_quota:
+                return False
+            self.requests[method] += 1
+            self.quota[method] += units
+            self.quota_by_key[key] += units
+            return True
+
+    def reset_counters(self):
+        with self.lock:
+            self.quota.clear()
+            self.requests.clear()
+            self.quota_by_key.clear()
+
+    # API methods
+
+    def search(self, params):
+        if params.get('channelId'):
+            channel_id = params['channelId']
+            items = []
+            if params.get('eventType') == 'live':
+                with self.lock:
+                    live_ids = [v for v, c in self.live.items() if c == channel_id]
+                items = [self._video_search_item(v) for v in live_ids]
+            return {'kind': 'youtube#searchListResponse', 'items': items}
+
+        query = params.get('q', '').lstrip('@').lower()
+        items = [
+            {
+                'id': {'kind': 'youtube#channel', 'channelId': channel_id},
+                'snippet': {'title': data['title'], 'channelId': channel_id},
+            }
+            for channel_id, data in self.channels.items()
+            if data['handle'] == query
+        ]
+        return {'kind': 'youtube#searchListResponse', 'items': items}
+
+    def channels_list(self, params):
+        items = []
+        for channel_id in params.get('id', '').split(','):
+            data = self.channels.get(channel_id)
+            if not data:
+                continue
+            items.append({
+                'id': channel_id,
+                'etag': f'etag-{channel_id}-{data["subscribers"]}',
+                'snippet': {
+                    'title': data['title'],
+                    'description': '',
+                    'customUrl': f'@{data["handle"]}',
+                    'thumbnails': {'high': {'url': f'https://yt3.example/{channel_id}=s800'}},
+                },
+                'statistics': {
+                    'subscriberCount': str(data['subscribers']),
+                    'viewCount': str(data['views']),
+                    'videoCount': str(data['videos']),
+                },
+            })
+        etag = 'etag-%x' % abs(hash(tuple(item['etag'] for item in items)))
+        return {'kind': 'youtube#channelListResponse', 'etag': etag, 'items': items}
+
+    def videos_list(self, params):
+        items = []
+        for video_id in params.get('id', '').split(','):
+            video = self.videos.get(video_id)
+            if not video:
+                continue
+            details = {'actualStartTime': _iso(video['started'])}
+            if video['ended']:
+                details['actualEndTime'] = _iso(video['ended'])
+            items.append({
+                'id': video_id,
+                'snippet': {
+                    'channelId': video['channel_id'],
+                    'title': video['title'],
+                    'description': '',
+                    'liveBroadcastContent': 'none' if video['ended'] else 'live',
+                },
+                'liveStreamingDetails': details,
+            })
+        return {'kind': 'youtube#videoListResponse', 'items': items}
+
+    def _video_search_item(self, video_id):
+        video = self.videos[video_id]
+        return {
+            'id': {'kind': 'youtube#video', 'videoId': video_id},
+            'snippet': {
+                'channelId': video['channel_id'],
+                'title': video['title'],
+                'description': '',
+                'liveBroadcastContent': 'live',
+            },
+        }
+
+
+def handle_for(index):
+    return f'bench{index:05d}'
+
+
+def _iso(timestamp):
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(timestamp))
+
+
+def make_handler(state):
+    routes = {
+        '/youtube/v3/search': ('search.list', state.search),
+        '/youtube/v3/channels': ('channels.list', state.channels_list),
+        '/youtube/v3/videos': ('videos.list', state.videos_list),
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            route = routes.get(url.path)
+            if url.path == '/_stats':
+                return self._send(200, {
+                    'quota': dict(state.quota),
+                    'quota_by_key': dict(state.quota_by_key),
+                    'requests': dict(state.requests),
+                })
+            if route is None:
+                return self._send(404, {'error': {'code': 404, 'message': 'Not found'}})
+            if state.latency:
+                time.sleep(state.latency)
+            method, handler = route
+            if not state.charge(method, params.get('key')):
+                return self._send(403, QUOTA_EXCEEDED_ERROR)
+            payload = handler(params)
+            if payload.get('etag') and payload['etag'] == self.headers.get('If-None-Match'):
+                return self._send(304, None)
+            self._send(200, payload)
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode() if payload is not None else b''
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=UTF-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(state, host='127.0.0.1', port=0):
+    """Start the fake API in a background thread and return the server"""
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake YouTube Data API server')
+    parser.add_argument('--channels', type=int, default=100)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--live-rate', type=float, default=0.01,
+                        help='Probability per tick that a channel goes live')
+    parser.add_argument('--end-rate', type=float, default=0.05,
+                        help='Probability per tick that a live stream ends')
+    parser.add_argument('--tick', type=float, default=60.0, help='Seconds between simulation ticks')
+    parser.add_argument('--latency', type=float, default=0.0, help='Artificial response latency in seconds')
+    parser.add_argument('--key-quota', type=int, default=None, help='Simulated daily quota per API key')
+    args = parser.parse_args()
+
+    state = FakeYouTube(args.channels, args.live_rate, args.end_rate, args.latency, args.key_quota)
+    server = serve(state, port=args.port)
+    print(f'Fake YouTube API with {args.channels} channels on http://127.0.0.1:{server.server_port}/')
+    try:
+        while True:
+            time.sleep(args.tick)
+            state.tick()
+            print(f'live streams: {len(state.live)}; quota spent: {sum(state.quota.values())}')
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,388 @@
+"""
+Offline benchmark and load-test scenarios.
+
+    python -m benchmarks.run poll --channels 500 --live 25
+    python -m benchmarks.run inline --channels 500 --live 25 --api-latency 0.05
+    python -m benchmarks.run stats --channels 2000
+    python -m benchmarks.run websub --channels 500 --live 25
+    python -m benchmarks.run record --recordings 20 --concurrency 5
+    python -m benchmarks.run views --channels 1000 --streams 20000
+    python -m benchmarks.run all --json report.json
+
+Each scenario prints wall time, latency percentiles, quota units spent on the
+fake API and the number of database queries.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from core.models import YouTubeChannel, MonitoringTask, LiveStream, Recording  # noqa: E402
+from core import api_keys, sweep, tasks, timeline, quota  # noqa: E402
+from core.locks import get_redis  # noqa: E402
+from benchmarks.fake_youtube import FakeYouTube, serve  # noqa: E402
+from benchmarks import fake_hub  # noqa: E402
+
+
+def percentiles(samples):
+    """Return p50/p95/p99/max of a list of seconds, in milliseconds"""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    if len(ordered) > 1:
+        cuts = statistics.quantiles(ordered, n=100, method='inclusive')
+    else:
+        cuts = ordered * 99
+    return {
+        'p50_ms': round(cuts[49] * 1000, 2),
+        'p95_ms': round(cuts[94] * 1000, 2),
+        'p99_ms': round(cuts[98] * 1000, 2),
+        'max_ms': round(ordered[-1] * 1000, 2),
+    }
+
+
+def reset_state():
+    """Clear the database tables and today's quota ledgers"""
+    for key in api_keys.get_api_keys():
+        get_redis().delete(quota.ledger_key(key.id))
+    Recording.objects.all().delete()
+    LiveStream.objects.all().delete()
+    MonitoringTask.objects.all().delete()
+    YouTubeChannel.objects.all().delete()
+
+
+def create_channels(fake, count, monitored=True):
+    channels = YouTubeChannel.objects.bulk_create([
+        YouTubeChannel(
+            handle=fake.channels[channel_id]['handle'],
+            channel_id=channel_id,
+            title=fake.channels[channel_id]['title'],
+        )
+        for channel_id in list(fake.channels)[:count]
+    ])
+    if monitored:
+        MonitoringTask.objects.bulk_create([MonitoringTask(channel=channel) for channel in channels])
+    return list(YouTubeChannel.objects.order_by('id'))
+
+
+def timed_channel_checks():
+    """Wrap update_channel_live_status to collect per-channel latency"""
+    samples = []
+    original = tasks.update_channel_live_status.run
+
+    def run(channel_id):
+        started = time.perf_counter()
+        try:
+            return original(channel_id)
+        finally:
+            samples.append(time.perf_counter() - started)
+
+    tasks.update_channel_live_status.run = run
+    return samples, lambda: setattr(tasks.update_channel_live_status, 'run', original)
+
+
+def scenario_poll(fake, args):
+    """One full detection sweep over all monitored channels"""
+    reset_state()
+    channels = create_channels(fake, args.channels)
+    for channel in channels[:args.live]:
+        fake.go_live(channel.channel_id)
+    fake.reset_counters()
+
+    os.environ['FAKE_YTARCHIVE_DURATION'] = '0'
+    samples, restore = timed_channel_checks()
+    started = time.perf_counter()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            tasks.periodic_channel_check()
+    finally:
+        restore()
+    elapsed = time.perf_counter() - started
+
+    detected = LiveStream.objects.count()
+    return {
+        'channels': len(channels),
+        'live_streams': args.live,
+        'detected': detected,
+        'recordings_started': Recording.objects.count(),
+        'wall_s': round(elapsed, 3),
+        'channel_check': percentiles(samples),
+        'quota_units': sum(fake.quota.values()),
+        'quota_by_method': dict(fake.quota),
+        'quota_by_key': dict(fake.quota_by_key),
+        'db_queries': len(queries),
+        'db_queries_per_channel': round(len(queries) / max(1, len(channels)), 2),
+    }
+
+
+def scenario_record(fake, args):
+    """Run record_stream for many streams concurrently with the fake recorder"""
+    reset_state()
+    bench_started = timezone.now()
+    channels = create_channels(fake, max(1, min(args.recordings, args.channels)))
+    recordings = []
+    for index in range(args.recordings):
+        channel = channels[index % len(channels)]
+        video_id = fake.go_live(channel.channel_id)
+        stream = LiveStream.objects.create(
+            channel=channel,
+            stream_id=video_id,
+            title=f'Benchmark stream {index}',
+            actual_start_time=timezone.now(),
+        )
+        recordings.append(Recording.objects.create(live_stream=stream).id)
+
+    os.environ['FAKE_YTARCHIVE_DURATION'] = str(args.duration)
+    samples = []
+
+    def record(recording_id):
+        started = time.perf_counter()
+        try:
+            tasks.record_stream(recording_id)
+        finally:
+            samples.append(time.perf_counter() - started)
+            connections.close_all()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(record, recordings))
+    elapsed = time.perf_counter() - started
+
+    completed = Recording.objects.filter(is_completed=True)
+    total_bytes = sum(r.file_size for r in completed)
+    return {
+        'recordings': len(recordings),
+        'concurrency': args.concurrency,
+        'completed': completed.count(),
+        'wall_s': round(elapsed, 3),
+        'recordings_per_s': round(len(recordings) / elapsed, 2),
+        'record_stream': percentiles(samples),
+        'audio_bytes': total_bytes,
+        'stages': timeline.stage_latencies(bench_started)['stages'],
+    }
+
+
+def scenario_views(fake, args):
+    """Request the main pages with a large number of channels and streams"""
+    reset_state()
+    channels = create_channels(fake, args.channels)
+    now = timezone.now()
+    streams = LiveStream.objects.bulk_create([
+        LiveStream(
+            channel=channels[index % len(channels)],
+            stream_id=f'bench-stream-{index}',
+            title=f'Archived stream {index}',
+            actual_start_time=now,
+            actual_end_time=now,
+            is_active=index % 50 == 0,
+        )
+        for index in range(args.streams)
+    ], batch_size=1000)
+    Recording.objects.bulk_create([
+        Recording(live_stream=stream, is_completed=True, audio_path=f'recordings/audio/{stream.stream_id}.mp3')
+        for stream in streams[:args.recordings_listed]
+    ], batch_size=1000)
+
+    client = Client()
+    report = {'channels': len(channels), 'streams': len(streams)}
+    for name, url in (('home', '/'), ('downloads', '/downloads/'), ('live_counts', '/api/live-counts/')):
+        samples = []
+        query_counts = []
+        for _ in range(args.repeat):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(url)
+                samples.append(time.perf_counter() - started)
+            assert response.status_code == 200, (url, response.status_code)
+            query_counts.append(len(queries))
+        report[name] = {**percentiles(samples), 'db_queries': max(query_counts)}
+    return report
+
+
+def scenario_inline(fake, args):
+    """The same sweep as `poll`, run in-process by `check_channels --inline`"""
+    reset_state()
+    channels = create_channels(fake, args.channels)
+    for channel in channels[:args.live]:
+        fake.go_live(channel.channel_id)
+    fake.reset_counters()
+
+    os.environ['FAKE_YTARCHIVE_DURATION'] = '0'
+    with CaptureQueriesContext(connection) as queries:
+        stats = sweep.run_sweep(args.concurrency * 4)
+
+    stats.update({
+        'detected': LiveStream.objects.count(),
+        'quota_by_key': dict(fake.quota_by_key),
+        'db_queries': len(queries),
+    })
+    return stats
+
+
+def scenario_stats(fake, args):
+    """Refresh statistics of all channels twice; the second pass should be all 304s"""
+    reset_state()
+    create_channels(fake, args.channels, monitored=False)
+    passes = []
+    for _ in range(2):
+        fake.reset_counters()
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            tasks.refresh_channel_statistics()
+        passes.append({
+            'wall_s': round(time.perf_counter() - started, 3),
+            'api_requests': sum(fake.requests.values()),
+            'db_queries': len(queries),
+        })
+    return {'channels': args.channels, 'first_pass': passes[0], 'second_pass': passes[1]}
+
+
+def serve_django():
+    """Serve the application over HTTP so the fake hub can reach the WebSub callback"""
+    from socketserver import ThreadingMixIn
+    from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+    from django.core.wsgi import get_wsgi_application
+
+    class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+        daemon_threads = True
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    server = make_server('127.0.0.1', 0, get_wsgi_application(),
+                         server_class=ThreadingWSGIServer, handler_class=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def wait_for(condition, timeout=30):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError('Condition not met in time')
+        time.sleep(0.01)
+
+
+def scenario_websub(fake, args):
+    """Detect streams from push notifications instead of polling every channel"""
+    reset_state()
+    channels = create_channels(fake, args.channels)
+    hub = fake_hub.FakeHub()
+    hub_server = fake_hub.serve(hub)
+    django_server = serve_django()
+    settings.WEBSUB_ENABLED = True
+    settings.WEBSUB_HUB_URL = f'http://127.0.0.1:{hub_server.server_port}/'
+    settings.WEBSUB_CALLBACK_BASE_URL = f'http://127.0.0.1:{django_server.server_port}'
+    os.environ['FAKE_YTARCHIVE_DURATION'] = '0'
+
+    try:
+        tasks.renew_websub_subscriptions()
+        wait_for(lambda: hub.verified >= len(channels))
+        # Steady state: the safety-net sweep has recently visited every channel
+        YouTubeChannel.objects.update(last_checked_at=timezone.now())
+        fake.reset_counters()
+
+        latencies = []
+        for channel in channels[:args.live]:
+            video_id = fake.go_live(channel.channel_id)
+            started = time.perf_counter()
+            hub.publish(channel.channel_id, video_id)
+            wait_for(lambda: LiveStream.objects.filter(stream_id=video_id).exists())
+            latencies.append(time.perf_counter() - started)
+
+        # One round of the safety-net machinery
+        tasks.periodic_channel_check()
+    finally:
+        settings.WEBSUB_ENABLED = False
+        hub_server.shutdown()
+        django_server.shutdown()
+
+    return {
+        'channels': len(channels),
+        'subscriptions_verified': hub.verified,
+        'notifications': hub.delivered,
+        'detected': LiveStream.objects.count(),
+        'detection': percentiles(latencies),
+        'quota_units': sum(fake.quota.values()),
+        'quota_by_method': dict(fake.quota),
+        'polling_equivalent_units': len(channels) * 100,
+    }
+
+
+SCENARIOS = {
+    'poll': scenario_poll,
+    'inline': scenario_inline,
+    'stats': scenario_stats,
+    'websub': scenario_websub,
+    'record': scenario_record,
+    'views': scenario_views,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='LivestreamTrap offline benchmarks')
+    parser.add_argument('scenario', choices=[*SCENARIOS, 'all'])
+    parser.add_argument('--channels', type=int, default=200)
+    parser.add_argument('--live', type=int, default=10, help='Channels that are live during a poll')
+    parser.add_argument('--recordings', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=1.0, help='Seconds each fake recording lasts')
+    parser.add_argument('--streams', type=int, default=5000)
+    parser.add_argument('--recordings-listed', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--api-latency', type=float, default=0.0)
+    parser.add_argument('--fake-key-quota', type=int, default=None,
+                        help='Make the fake API answer quotaExceeded once a key spent this many units')
+    parser.add_argument('--daily-quota', type=int, default=1_000_000,
+                        help='Quota budget for the governor; lower it to benchmark pacing')
+    parser.add_argument('--json', help='Write the report to this file')
+    args = parser.parse_args(argv)
+
+    call_command('migrate', verbosity=0)
+
+    fake = FakeYouTube(
+        max(args.channels, args.recordings),
+        latency=args.api_latency,
+        key_quota=args.fake_key_quota,
+        seed=1
+    )
+    server = serve(fake)
+    settings.YOUTUBE_API_ENDPOINT = f'http://127.0.0.1:{server.server_port}/'
+    settings.YOUTUBE_DAILY_QUOTA = args.daily_quota
+
+    names = list(SCENARIOS) if args.scenario == 'all' else [args.scenario]
+    report = {}
+    try:
+        for name in names:
+            print(f'Running {name}...', file=sys.stderr)
+            report[name] = SCENARIOS[name](fake, args)
+    finally:
+        server.shutdown()
+
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    print(f'Benchmark data in {settings.BENCH_DIR}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+Settings for the offline benchmark suite.
+
+Everything runs against a throw-away SQLite database and media directory,
+Celery tasks execute eagerly in-process and the YouTube API, ytarchive and
+ffmpeg are replaced by the stand-ins from this package. Redis is still
+required for locks and the quota ledger (BENCH_REDIS_URL, default
+redis://localhost:6379/15 so that benchmarks never touch the production ledger).
+"""
+import os
+import tempfile
+from pathlib import Path
+
+from livestreamtrap.settings import *  # noqa: F401,F403
+
+BENCH_DIR = Path(os.getenv('BENCH_DIR') or tempfile.mkdtemp(prefix='livestreamtrap-bench-'))
+BIN_DIR = Path(__file__).resolve().parent / 'bin'
+
+DEBUG = False
+ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BENCH_DIR / 'bench.sqlite3',
+        'OPTIONS': {'timeout': 30},
+    }
+}
+
+MEDIA_ROOT = BENCH_DIR / 'media'
+RECORDINGS_DIR = MEDIA_ROOT / 'recordings'
+TEMP_DIR = MEDIA_ROOT / 'temp'
+RECORDINGS_DIR.mkdir(parents=True, exist_ok=True)
+TEMP_DIR.mkdir(parents=True, exist_ok=True)
+
+CELERY_TASK_ALWAYS_EAGER = True
+REDIS_URL = os.getenv('BENCH_REDIS_URL', 'redis://localhost:6379/15')
+
+YOUTUBE_API_KEY = 'benchmark'
+YOUTUBE_API_KEYS = [f'benchmark-{index}' for index in range(int(os.getenv('BENCH_API_KEYS', 1)))]
+YOUTUBE_KEY_RATE = float(os.getenv('BENCH_KEY_RATE', 1000))
+YOUTUBE_KEY_BURST = int(os.getenv('BENCH_KEY_BURST', 1000))
+YTARCHIVE_BIN = str(BIN_DIR / 'ytarchive')
+FFMPEG_BIN = str(BIN_DIR / 'ffmpeg')
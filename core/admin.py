@@ -1,5 +1,10 @@
+from django.conf import settings
 from django.contrib import admin
-from .models import YouTubeChannel, MonitoringTask, LiveStream, Recording
+from django.db.models import Q
+from django.utils.html import format_html
+from .models import YouTubeChannel, MonitoringTask, LiveStream, Recording, RecordingPart, StreamEvent, WebSubSubscription
+from .paginators import EstimatedCountPaginator
+from . import search
 
 @admin.register(YouTubeChannel)
 class YouTubeChannelAdmin(admin.ModelAdmin):
@@ -22,12 +27,14 @@ class YouTubeChannelAdmin(admin.ModelAdmin):
 
 @admin.register(MonitoringTask)
 class MonitoringTaskAdmin(admin.ModelAdmin):
-    list_display = ['channel', 'is_active', 'recordings_count', 'created_at']
-    list_filter = ['is_active', 'created_at']
+    list_display = ['channel', 'is_active', 'priority', 'recordings_count', 'created_at']
+    list_select_related = ['channel']
+    list_editable = ['priority']
+    list_filter = ['is_active', 'priority', 'created_at']
     readonly_fields = ['created_at', 'updated_at']
     fieldsets = (
         ('Информация о задаче', {
-            'fields': ('channel', 'is_active', 'recordings_count')
+            'fields': ('channel', 'is_active', 'priority', 'recordings_count')
         }),
         ('Даты', {
             'fields': ('created_at', 'updated_at'),
@@ -35,11 +42,25 @@ class MonitoringTaskAdmin(admin.ModelAdmin):
         }),
     )
 
+class StreamEventInline(admin.TabularInline):
+    model = StreamEvent
+    fields = ['event', 'at']
+    readonly_fields = ['event', 'at']
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
 @admin.register(LiveStream)
 class LiveStreamAdmin(admin.ModelAdmin):
     list_display = ['title', 'channel', 'is_active', 'is_recording', 'actual_start_time']
     list_filter = ['is_active', 'is_recording', 'actual_start_time']
+    list_select_related = ['channel']
     search_fields = ['title', 'channel__handle']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    inlines = [StreamEventInline]
     readonly_fields = ['created_at', 'updated_at']
     fieldsets = (
         ('Основная информация', {
@@ -57,19 +78,67 @@ class LiveStreamAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index instead of icontains scans where the database has one
+        ids = search.search_ids(search_term, settings.ADMIN_SEARCH_RESULTS_LIMIT) if search_term else None
+        if ids is None:
+            return super().get_search_results(request, queryset, search_term)
+        # The index has no channel handles; channels are few, so match those directly
+        return queryset.filter(Q(id__in=ids) | Q(channel__handle__icontains=search_term.strip())), False
+
+class RecordingPartInline(admin.TabularInline):
+    model = RecordingPart
+    fields = ['index', 'video_path', 'file_size', 'is_complete', 'capture_started', 'capture_finished']
+    readonly_fields = ['index', 'video_path', 'file_size', 'is_complete', 'capture_started', 'capture_finished']
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
 @admin.register(Recording)
 class RecordingAdmin(admin.ModelAdmin):
-    list_display = ['live_stream', 'is_completed', 'file_size', 'recording_started']
-    list_filter = ['is_completed', 'recording_started']
-    readonly_fields = ['recording_started', 'recording_finished', 'created_at']
+    list_display = ['live_stream', 'is_completed', 'file_size', 'recording_started', 'live_link']
+    list_filter = ['is_completed', 'recording_started', 'archived_at']
+    list_select_related = ['live_stream']
+    raw_id_fields = ['live_stream']
+    inlines = [RecordingPartInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    readonly_fields = ['recording_started', 'recording_finished', 'archived_at', 'created_at']
     fieldsets = (
         ('Информация о записи', {
-            'fields': ('live_stream', 'is_completed', 'file_size', 'duration')
+            'fields': ('live_stream', 'is_completed', 'file_size', 'duration', 'node', 'max_quality', 'quality', 'attempts')
         }),
         ('Файлы', {
             'fields': ('original_video_path', 'audio_path')
         }),
         ('Время записи', {
-            'fields': ('recording_started', 'recording_finished', 'created_at')
+            'fields': ('recording_started', 'recording_finished', 'archived_at', 'created_at')
+        }),
+    )
+
+    @admin.display(description='Прямой эфир')
+    def live_link(self, obj):
+        if obj.live_url:
+            return format_html('<a href="{}">HLS</a>', obj.live_url)
+        return '-'
+
+@admin.register(WebSubSubscription)
+class WebSubSubscriptionAdmin(admin.ModelAdmin):
+    list_display = ['channel', 'is_active', 'verified_at', 'lease_expires_at']
+    list_select_related = ['channel']
+    list_filter = ['is_active']
+    readonly_fields = ['secret', 'requested_at', 'verified_at', 'lease_expires_at', 'created_at', 'updated_at']
+    fieldsets = (
+        ('Подписка', {
+            'fields': ('channel', 'is_active', 'secret')
+        }),
+        ('Аренда', {
+            'fields': ('requested_at', 'verified_at', 'lease_expires_at')
+        }),
+        ('Даты', {
+            'fields': ('created_at', 'updated_at'),
+            'classes': ('collapse',)
         }),
     )
\ No newline at end of file
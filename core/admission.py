@@ -0,0 +1,75 @@
+import time
+
+from django.conf import settings
+
+from .locks import get_redis
+
+QUEUE_KEY = 'livestreamtrap:admission:queue'
+ADMITTED_KEY = 'livestreamtrap:admission:admitted'
+
+# ytarchive quality used when a recording is admitted under load
+DEGRADED_QUALITY = 'audio_only'
+DEFAULT_QUALITY = 'best'
+
+
+def enqueue(recording_id, priority):
+    """
+    Put a recording in the admission queue.
+
+    Higher priorities come first, equal priorities in arrival order.
+    """
+    score = -priority * 1e12 + time.time()
+    get_redis().zadd(QUEUE_KEY, {recording_id: score}, nx=True)
+
+
+def pending():
+    """Waiting recording ids, highest priority first"""
+    return [int(value) for value in get_redis().zrange(QUEUE_KEY, 0, -1)]
+
+
+def remove(recording_id):
+    get_redis().zrem(QUEUE_KEY, recording_id)
+
+
+def admit(recording_id):
+    pipe = get_redis().pipeline()
+    pipe.sadd(ADMITTED_KEY, recording_id)
+    pipe.zrem(QUEUE_KEY, recording_id)
+    pipe.execute()
+
+
+def release(recording_id):
+    """Free the slot of a finished or abandoned recording"""
+    get_redis().srem(ADMITTED_KEY, recording_id)
+
+
+def admitted_count():
+    return get_redis().scard(ADMITTED_KEY)
+
+
+def admitted_ids():
+    return [int(value) for value in get_redis().smembers(ADMITTED_KEY)]
+
+
+def capacity_for(priority):
+    """
+    Number of concurrent recordings a recording of this priority may join.
+
+    The top RECORDING_HIGH_PRIORITY_RESERVE slots are kept for high priority channels.
+    """
+    from .models import MonitoringTask
+
+    capacity = settings.MAX_CONCURRENT_RECORDINGS
+    if priority < MonitoringTask.PRIORITY_HIGH:
+        capacity -= settings.RECORDING_HIGH_PRIORITY_RESERVE
+    return capacity
+
+
+def choose_quality(priority, active):
+    """Record below-high priority streams audio-only once the system is busy"""
+    from .models import MonitoringTask
+
+    busy = active >= settings.MAX_CONCURRENT_RECORDINGS * settings.RECORDING_DEGRADE_THRESHOLD
+    if busy and priority < MonitoringTask.PRIORITY_HIGH:
+        return DEGRADED_QUALITY
+    return DEFAULT_QUALITY
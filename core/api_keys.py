@@ -0,0 +1,91 @@
+import hashlib
+import logging
+import math
+import time
+from collections import namedtuple
+
+from django.conf import settings
+
+from . import quota
+from .locks import get_redis
+
+logger = logging.getLogger(__name__)
+
+ApiKey = namedtuple('ApiKey', ['id', 'value'])
+
+# Token bucket refill as a single atomic step: returns 1 if a token was taken
+TOKEN_BUCKET_SCRIPT = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens') or ARGV[2])
+local updated = tonumber(redis.call('HGET', KEYS[1], 'updated') or ARGV[3])
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local taken = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    taken = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return taken
+"""
+
+_token_bucket = None
+
+
+class RateLimited(quota.QuotaExhausted):
+    """Raised when every key with quota left is out of request tokens"""
+
+
+def refill_seconds():
+    """Seconds until the token buckets of the keys are full again"""
+    return math.ceil(settings.YOUTUBE_KEY_BURST / settings.YOUTUBE_KEY_RATE)
+
+
+def get_api_keys():
+    """API keys of the pool, identified by a short hash so keys never end up in Redis"""
+    return [
+        ApiKey(hashlib.sha256(value.encode()).hexdigest()[:12], value)
+        for value in settings.YOUTUBE_API_KEYS
+    ]
+
+
+def take_token(key_id):
+    """Take one request token from the per-key token bucket"""
+    global _token_bucket
+    if _token_bucket is None:
+        _token_bucket = get_redis().register_script(TOKEN_BUCKET_SCRIPT)
+    return bool(_token_bucket(
+        keys=[f'livestreamtrap:ratelimit:{key_id}'],
+        args=[settings.YOUTUBE_KEY_RATE, settings.YOUTUBE_KEY_BURST, time.time()]
+    ))
+
+
+def acquire(method, critical=False, exclude=()):
+    """
+    Pick the API key with the most quota left that can afford `method` and has a
+    free request token.
+
+    Waits for tokens up to YOUTUBE_KEY_MAX_WAIT seconds, then raises RateLimited.
+    Raises QuotaExhausted when no key has enough quota left.
+    """
+    units = quota.cost(method)
+    deadline = time.monotonic() + settings.YOUTUBE_KEY_MAX_WAIT
+    while True:
+        spent = quota.spent_by_key()
+        candidates = sorted(
+            (key for key in get_api_keys()
+             if key.id not in exclude and quota.can_spend(units, spent[key.id], critical)),
+            key=lambda key: spent[key.id]
+        )
+        if not candidates:
+            raise quota.QuotaExhausted(f"Not enough YouTube API quota left for {method}")
+
+        for key in candidates:
+            if take_token(key.id):
+                return key
+
+        if time.monotonic() >= deadline:
+            raise RateLimited(f"All YouTube API keys are rate limited for {method}")
+        time.sleep(1 / settings.YOUTUBE_KEY_RATE)
@@ -0,0 +1,58 @@
+import io
+import os
+import zipfile
+
+# Bytes read from a recording per chunk of the response
+CHUNK_SIZE = 1024 * 1024
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Write-only, unseekable sink; ZipFile falls back to data descriptors for it"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def archive_name(recording):
+    """File name of a recording inside the export archive"""
+    channel = recording.live_stream.channel
+    return f'{channel.handle}/{os.path.basename(recording.audio_path.name)}'
+
+
+def stream_zip(recordings):
+    """
+    Yield a ZIP archive of the audio files of `recordings` chunk by chunk.
+
+    The audio is already compressed, so entries are stored as is. Nothing is
+    written to disk and at most one chunk is held in memory, whatever the
+    size of the export.
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for recording in recordings:
+            path = recording.audio_path.path
+            if not os.path.isfile(path):
+                continue
+            info = zipfile.ZipInfo.from_file(path, arcname=archive_name(recording))
+            info.compress_type = zipfile.ZIP_STORED
+            with open(path, 'rb') as source, archive.open(info, 'w') as target:
+                while True:
+                    chunk = source.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    target.write(chunk)
+                    yield buffer.pop()
+            yield buffer.pop()
+    yield buffer.pop()
@@ -1,6 +1,8 @@
 from django import forms
 from django.core.validators import MinLengthValidator, MaxLengthValidator
 
+from .models import Recording, YouTubeChannel
+
 
 class ChannelHandleForm(forms.Form):
     handle = forms.CharField(
@@ -21,4 +23,51 @@ class ChannelHandleForm(forms.Form):
         handle = self.cleaned_data['handle'].strip()
         if handle.startswith('@'):
             handle = handle[1:]
-        return handle
\ No newline at end of file
+        return handle
+
+
+class RecordingExportForm(forms.Form):
+    """Selection of recordings to export: explicit ids, or a channel and date range filter"""
+    recording = forms.ModelMultipleChoiceField(
+        queryset=Recording.objects.filter(is_completed=True),
+        required=False,
+        widget=forms.MultipleHiddenInput
+    )
+    channel = forms.ModelChoiceField(
+        queryset=YouTubeChannel.objects.order_by('handle'),
+        required=False,
+        empty_label='Все каналы',
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    date_from = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'})
+    )
+    date_to = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'})
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        # An empty selection must not turn into an export of every recording
+        if not any(cleaned_data.get(field) for field in ('recording', 'channel', 'date_from', 'date_to')):
+            raise forms.ValidationError('Выберите записи или задайте канал или период')
+        return cleaned_data
+
+    def recordings(self):
+        recordings = Recording.objects.filter(
+            is_completed=True
+        ).select_related(
+            'live_stream__channel'
+        ).order_by('live_stream__channel__handle', 'live_stream__actual_start_time')
+
+        if self.cleaned_data['recording']:
+            return recordings.filter(id__in=self.cleaned_data['recording'])
+        if self.cleaned_data['channel']:
+            recordings = recordings.filter(live_stream__channel=self.cleaned_data['channel'])
+        if self.cleaned_data['date_from']:
+            recordings = recordings.filter(live_stream__actual_start_time__date__gte=self.cleaned_data['date_from'])
+        if self.cleaned_data['date_to']:
+            recordings = recordings.filter(live_stream__actual_start_time__date__lte=self.cleaned_data['date_to'])
+        return recordings
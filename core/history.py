@@ -0,0 +1,146 @@
+import logging
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import ChannelStatSample, LiveStream
+
+logger = logging.getLogger(__name__)
+
+# Each resolution is rolled up into the next one and pruned after its retention
+ROLLUPS = [
+    (ChannelStatSample.MINUTE, ChannelStatSample.HOUR),
+    (ChannelStatSample.HOUR, ChannelStatSample.DAY),
+]
+COUNT_FIELDS = ('subscriber_count', 'view_count', 'video_count')
+
+
+def bucket_start(moment, resolution):
+    """Start of the bucket of `resolution` seconds that contains `moment`"""
+    moment = moment.astimezone(dt_timezone.utc)
+    if resolution == ChannelStatSample.DAY:
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if resolution == ChannelStatSample.HOUR:
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(second=0, microsecond=0)
+
+
+def retention(resolution):
+    """How long samples of a resolution are kept; None means forever"""
+    if resolution == ChannelStatSample.MINUTE:
+        return timedelta(hours=settings.CHANNEL_HISTORY_MINUTE_RETENTION_HOURS)
+    if resolution == ChannelStatSample.HOUR:
+        return timedelta(days=settings.CHANNEL_HISTORY_HOUR_RETENTION_DAYS)
+    return None
+
+
+def upsert(samples, update_fields):
+    ChannelStatSample.objects.bulk_create(
+        samples,
+        update_conflicts=True,
+        unique_fields=['channel', 'resolution', 'bucket'],
+        update_fields=update_fields,
+        batch_size=500
+    )
+
+
+def record_statistics(channels, now=None):
+    """Store the current subscriber, view and video counts of channels as minute samples"""
+    bucket = bucket_start(now or timezone.now(), ChannelStatSample.MINUTE)
+    upsert([
+        ChannelStatSample(
+            channel_id=channel.id,
+            resolution=ChannelStatSample.MINUTE,
+            bucket=bucket,
+            subscriber_count=channel.subscriber_count,
+            view_count=channel.view_count,
+            video_count=channel.video_count
+        )
+        for channel in channels
+    ], list(COUNT_FIELDS))
+
+
+def record_live_minutes(now=None):
+    """Add one live minute per active stream to the current minute sample of its channel"""
+    bucket = bucket_start(now or timezone.now(), ChannelStatSample.MINUTE)
+    live = LiveStream.objects.filter(is_active=True).values('channel_id').annotate(streams=Count('id'))
+    samples = [
+        ChannelStatSample(
+            channel_id=row['channel_id'],
+            resolution=ChannelStatSample.MINUTE,
+            bucket=bucket,
+            live_minutes=row['streams']
+        )
+        for row in live
+    ]
+    upsert(samples, ['live_minutes'])
+    return len(samples)
+
+
+def roll_up(source, target, now=None):
+    """
+    Aggregate completed `source` buckets into `target` buckets.
+
+    Starts again from the last target bucket written, so a run that was missed
+    or a bucket that was still filling is recomputed; upserts keep it idempotent.
+    """
+    current = bucket_start(now or timezone.now(), target)
+    last = ChannelStatSample.objects.filter(resolution=target).aggregate(last=Max('bucket'))['last']
+    rows = ChannelStatSample.objects.filter(resolution=source, bucket__lt=current)
+    if last is not None:
+        rows = rows.filter(bucket__gte=last)
+
+    rollups = {}
+    for row in rows.order_by('bucket').values('channel_id', 'bucket', 'live_minutes', *COUNT_FIELDS).iterator():
+        key = (row['channel_id'], bucket_start(row['bucket'], target))
+        rollup = rollups.setdefault(key, {'live_minutes': 0, **{field: None for field in COUNT_FIELDS}})
+        rollup['live_minutes'] += row['live_minutes']
+        # Counts keep the last value seen in the bucket
+        for field in COUNT_FIELDS:
+            if row[field] is not None:
+                rollup[field] = row[field]
+
+    upsert([
+        ChannelStatSample(channel_id=channel_id, resolution=target, bucket=bucket, **values)
+        for (channel_id, bucket), values in rollups.items()
+    ], ['live_minutes', *COUNT_FIELDS])
+    return len(rollups)
+
+
+def prune(now=None):
+    """Delete samples past the retention of their resolution; returns the number deleted"""
+    now = now or timezone.now()
+    deleted = 0
+    for resolution, _ in ROLLUPS:
+        deleted += ChannelStatSample.objects.filter(
+            resolution=resolution,
+            bucket__lt=now - retention(resolution)
+        ).delete()[0]
+    return deleted
+
+
+def choose_resolution(start, end, now=None):
+    """Finest resolution that still covers `start` and keeps the number of points small"""
+    now = now or timezone.now()
+    span = end - start
+    for resolution, max_span in (
+        (ChannelStatSample.MINUTE, timedelta(hours=6)),
+        (ChannelStatSample.HOUR, timedelta(days=14)),
+    ):
+        if span <= max_span and start >= now - retention(resolution):
+            return resolution
+    return ChannelStatSample.DAY
+
+
+def series(channel_id, start, end, resolution=None):
+    """Samples of a channel between `start` and `end`, as a list of dicts ordered by time"""
+    resolution = resolution or choose_resolution(start, end)
+    points = ChannelStatSample.objects.filter(
+        channel_id=channel_id,
+        resolution=resolution,
+        bucket__gte=bucket_start(start, resolution),
+        bucket__lt=end
+    ).order_by('bucket').values('bucket', 'live_minutes', *COUNT_FIELDS)
+    return resolution, list(points)
@@ -0,0 +1,92 @@
+import logging
+import shutil
+import subprocess
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+LIVE_SUBDIR = 'live'
+PLAYLIST_NAME = 'index.m3u8'
+
+# ytarchive appends the downloaded audio fragments (itag 140, AAC) to this file next to its output
+AUDIO_FRAGMENTS_SUFFIX = '.f140.ts'
+
+
+def live_dir(recording_id):
+    return settings.MEDIA_ROOT / LIVE_SUBDIR / str(recording_id)
+
+
+def playlist_url(recording_id):
+    return f'{settings.MEDIA_URL}{LIVE_SUBDIR}/{recording_id}/{PLAYLIST_NAME}'
+
+
+class LivePreview(threading.Thread):
+    """
+    Republishes the audio of a recording in progress as a rolling HLS playlist.
+
+    ffmpeg follows the growing audio fragment file written by ytarchive and
+    stream-copies it into short MPEG-TS segments under MEDIA_ROOT/live/<id>/,
+    so the preview costs almost no CPU. The directory is removed on stop.
+    """
+
+    def __init__(self, recording_id, capture_base):
+        super().__init__(name=f'live-preview-{recording_id}', daemon=True)
+        self.recording_id = recording_id
+        self.fragments_path = capture_base.parent / f'{capture_base.name}{AUDIO_FRAGMENTS_SUFFIX}'
+        self.output_dir = live_dir(recording_id)
+        self.process = None
+        self.stopped = threading.Event()
+
+    def run(self):
+        waited = 0
+        while not self.fragments_path.exists():
+            if self.stopped.wait(1):
+                return
+            if waited >= settings.LIVE_HLS_START_TIMEOUT:
+                logger.warning(f"No audio fragments for live preview of recording {self.recording_id}")
+                return
+            waited += 1
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        ffmpeg_cmd = [
+            settings.FFMPEG_BIN,
+            '-v', 'error',
+            '-follow', '1',
+            '-i', f'file:{self.fragments_path}',
+            '-map', '0:a:0',
+            '-c:a', 'copy',
+            '-f', 'hls',
+            '-hls_time', str(settings.LIVE_HLS_SEGMENT_SECONDS),
+            '-hls_list_size', str(settings.LIVE_HLS_LIST_SIZE),
+            '-hls_flags', 'delete_segments',
+            '-hls_segment_filename', str(self.output_dir / 'segment_%05d.ts'),
+            str(self.output_dir / PLAYLIST_NAME)
+        ]
+        try:
+            self.process = subprocess.Popen(
+                ffmpeg_cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True
+            )
+        except Exception as e:
+            logger.error(f"Error starting live preview for recording {self.recording_id}: {str(e)}")
+            return
+
+        logger.info(f"Live preview of recording {self.recording_id} at {playlist_url(self.recording_id)}")
+        if self.stopped.is_set():
+            self.process.terminate()
+        _, stderr = self.process.communicate()
+        if self.process.returncode not in (0, -15, 255) and not self.stopped.is_set():
+            logger.error(f"Live preview ffmpeg failed for recording {self.recording_id}: {stderr}")
+
+    def stop(self):
+        self.stopped.set()
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+        self.join(timeout=10)
+        if self.process and self.process.poll() is None:
+            self.process.kill()
+        shutil.rmtree(self.output_dir, ignore_errors=True)
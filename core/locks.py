@@ -0,0 +1,53 @@
+import logging
+from contextlib import contextmanager
+
+import redis
+from django.conf import settings
+from redis.exceptions import LockError
+
+logger = logging.getLogger(__name__)
+
+_redis_client = None
+
+
+def get_redis():
+    """Return a shared Redis client"""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(settings.REDIS_URL)
+    return _redis_client
+
+
+@contextmanager
+def redis_lock(name, timeout):
+    """
+    Try to acquire a non-blocking Redis lock.
+
+    Yields True if the lock was acquired and False if another worker holds it.
+    The lock expires after `timeout` seconds so a crashed worker cannot keep it forever.
+    """
+    lock = get_redis().lock(f'livestreamtrap:lock:{name}', timeout=timeout, blocking=False)
+    acquired = lock.acquire()
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                lock.release()
+            except LockError:
+                logger.warning(f"Lock {name} expired before release")
+
+
+def channel_lock(channel_id):
+    """Lock held while a channel is being polled"""
+    return redis_lock(f'channel:{channel_id}', settings.CHANNEL_CHECK_LOCK_TIMEOUT)
+
+
+def stream_lock(stream_id):
+    """Lock held while a recording is being started for a stream"""
+    return redis_lock(f'stream:{stream_id}', settings.STREAM_LOCK_TIMEOUT)
+
+
+def is_locked(name):
+    """Check whether a lock is currently held by any worker"""
+    return bool(get_redis().exists(f'livestreamtrap:lock:{name}'))
@@ -1,13 +1,66 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from core.sweep import run_sweep
 from core.tasks import periodic_channel_check
 
 
 class Command(BaseCommand):
     help = 'Check all monitored channels for live streams'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--inline',
+            action='store_true',
+            help='Run one full sweep in this process instead of queueing a Celery task'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.INLINE_SWEEP_WORKERS,
+            help='Concurrent YouTube API calls in --inline mode'
+        )
+        parser.add_argument(
+            '--no-record',
+            action='store_true',
+            help='Only detect streams in --inline mode, do not queue recordings'
+        )
+
     def handle(self, *args, **options):
+        if options['inline']:
+            self.run_inline(options)
+            return
+
         self.stdout.write('Starting channel check...')
         periodic_channel_check.delay()
         self.stdout.write(
             self.style.SUCCESS('Channel check task queued successfully')
-        )
\ No newline at end of file
+        )
+
+    def run_inline(self, options):
+        self.stdout.write(f"Checking channels inline with {options['workers']} workers...")
+        stats = run_sweep(options['workers'], dispatch_recordings=not options['no_record'])
+
+        self.stdout.write(
+            f"Channels: {stats['checked']} of {stats['channels']} checked, "
+            f"{stats['skipped_quota']} skipped for quota, {stats['errors']} failed"
+        )
+        self.stdout.write(
+            f"Streams: {stats['new_streams']} new, {stats['ended_streams']} ended, "
+            f"{stats['recordings_started']} recordings queued"
+        )
+        latency = stats['call_latency']
+        if latency:
+            self.stdout.write(
+                f"API calls: p50 {latency['p50_ms']} ms, p95 {latency['p95_ms']} ms, max {latency['max_ms']} ms"
+            )
+        self.stdout.write(
+            f"Time: API {stats['api_seconds']}s, DB {stats['db_seconds']}s, total {stats['total_seconds']}s"
+        )
+        units = ', '.join(f'{method} {count}' for method, count in stats['quota_units'].items()) or 'none'
+        remaining = stats['quota_remaining']
+        self.stdout.write(
+            f"Quota: spent {units}; "
+            + (f"{remaining} units left today" if remaining is not None else 'shared ledger unavailable')
+        )
+        style = self.style.SUCCESS if not stats['errors'] else self.style.WARNING
+        self.stdout.write(style('Inline channel check finished'))
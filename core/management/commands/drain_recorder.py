@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+from core import recorders
+from core.tasks import hand_off_recordings
+
+
+class Command(BaseCommand):
+    help = 'Stop placing recordings on a recorder node before it is restarted'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--node',
+            default=recorders.current_node(),
+            help='Recorder node to drain (default: this host)'
+        )
+        parser.add_argument(
+            '--handoff',
+            action='store_true',
+            help='Move the running recordings to other nodes instead of letting them finish'
+        )
+        parser.add_argument(
+            '--wait',
+            action='store_true',
+            help='Wait until the node has no recordings left'
+        )
+        parser.add_argument(
+            '--cancel',
+            action='store_true',
+            help='Let the node take recordings again'
+        )
+
+    def handle(self, *args, **options):
+        node = options['node']
+        if options['cancel']:
+            recorders.undrain(node)
+            self.stdout.write(self.style.SUCCESS(f'Node {node} takes recordings again'))
+            return
+
+        recorders.drain(node)
+        self.stdout.write(f'Node {node} is draining, {len(recorders.active_recordings(node))} recordings active')
+
+        if options['handoff']:
+            handed_off = hand_off_recordings(node)
+            self.stdout.write(f'{handed_off} recordings are being handed off')
+
+        if options['wait']:
+            while True:
+                active = len(recorders.active_recordings(node))
+                if not active:
+                    break
+                if node not in recorders.live_nodes():
+                    self.stdout.write(self.style.WARNING(f'Node {node} is gone with {active} recordings'))
+                    return
+                if options['handoff']:
+                    # Retry recordings whose replacement did not start in time
+                    hand_off_recordings(node)
+                self.stdout.write(f'Waiting for {active} recordings...')
+                time.sleep(10)
+
+        self.stdout.write(self.style.SUCCESS(f'Node {node} is drained' if options['wait'] else f'Node {node} is draining'))
@@ -0,0 +1,144 @@
+import glob
+import os
+import time
+from contextlib import contextmanager
+
+import redis
+from django.conf import settings
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+# When PROMETHEUS_MULTIPROC_DIR is set every web and Celery worker process
+# writes its samples to that directory and the /metrics view merges them.
+# With METRICS_MULTIPROC_ROOT each container has its own directory below it,
+# so a restarting container only clears its own files.
+
+API_QUOTA_UNITS = Counter(
+    'livestreamtrap_youtube_quota_units_total',
+    'YouTube Data API quota units spent',
+    ['method']
+)
+API_REQUEST_LATENCY = Histogram(
+    'livestreamtrap_youtube_request_seconds',
+    'YouTube Data API request latency',
+    ['method']
+)
+CHANNEL_POLL_LATENCY = Histogram(
+    'livestreamtrap_channel_poll_seconds',
+    'Duration of a single channel live status check',
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+DETECTION_TO_RECORDING = Histogram(
+    'livestreamtrap_detection_to_recording_seconds',
+    'Time from live stream detection to recorder start',
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600)
+)
+ACTIVE_RECORDINGS = Gauge(
+    'livestreamtrap_active_recordings',
+    'Number of ytarchive processes currently running',
+    multiprocess_mode='livesum'
+)
+CAPTURED_BYTES = Counter(
+    'livestreamtrap_captured_bytes_total',
+    'Bytes of video captured by ytarchive'
+)
+ARCHIVED_BYTES_SAVED = Counter(
+    'livestreamtrap_archived_bytes_saved_total',
+    'Disk space freed by moving recordings to the archive tier'
+)
+FFMPEG_DURATION = Histogram(
+    'livestreamtrap_ffmpeg_seconds',
+    'Duration of ffmpeg conversions',
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800)
+)
+QUOTA_REMAINING = Gauge(
+    'livestreamtrap_youtube_quota_remaining_units',
+    'YouTube Data API quota units left until the daily reset',
+    multiprocess_mode='mostrecent'
+)
+TASK_DB_QUERIES = Histogram(
+    'livestreamtrap_task_db_queries',
+    'Database queries executed per Celery task run',
+    ['task'],
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 1000)
+)
+
+
+@contextmanager
+def observe_duration(histogram, *labels):
+    """Observe the wall-clock duration of a block"""
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        metric = histogram.labels(*labels) if labels else histogram
+        metric.observe(time.monotonic() - start)
+
+
+class QueryCounter:
+    """Django execute wrapper that counts database queries"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class QueueDepthCollector:
+    """Report Celery queue lengths straight from the Redis broker at scrape time"""
+
+    def collect(self):
+        gauge = GaugeMetricFamily(
+            'livestreamtrap_celery_queue_depth',
+            'Number of messages waiting in a Celery queue',
+            labels=['queue']
+        )
+        try:
+            client = redis.Redis.from_url(settings.CELERY_BROKER_URL)
+            queues = set(settings.METRICS_CELERY_QUEUES)
+            # Per-node recorder queues
+            queues.update(key.decode() for key in client.scan_iter(match='recorder.*', _type='list'))
+            for queue in sorted(queues):
+                gauge.add_metric([queue], client.llen(queue))
+        except redis.RedisError:
+            pass
+        yield gauge
+
+
+REGISTRY.register(QueueDepthCollector())
+
+
+class MultiProcessTreeCollector:
+    """Merge the multiprocess samples of every container directory below a root"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def collect(self):
+        files = glob.glob(os.path.join(self.root, '*', '*.db'))
+        return multiprocess.MultiProcessCollector.merge(files, accumulate=True)
+
+
+def generate_metrics():
+    """Render all metrics in the Prometheus text format"""
+    registry = REGISTRY
+    if settings.METRICS_MULTIPROC_ROOT:
+        registry = CollectorRegistry()
+        registry.register(MultiProcessTreeCollector(settings.METRICS_MULTIPROC_ROOT))
+        registry.register(QueueDepthCollector())
+    elif os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(QueueDepthCollector())
+    return generate_latest(registry), CONTENT_TYPE_LATEST
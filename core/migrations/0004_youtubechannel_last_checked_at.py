@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_remove_youtubechannel_is_active'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='youtubechannel',
+            name='last_checked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
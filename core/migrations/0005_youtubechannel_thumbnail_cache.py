@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_youtubechannel_last_checked_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='youtubechannel',
+            name='thumbnail_1x',
+            field=models.FileField(blank=True, upload_to='thumbnails/'),
+        ),
+        migrations.AddField(
+            model_name='youtubechannel',
+            name='thumbnail_2x',
+            field=models.FileField(blank=True, upload_to='thumbnails/'),
+        ),
+        migrations.AddField(
+            model_name='youtubechannel',
+            name='thumbnail_cached_from',
+            field=models.URLField(blank=True),
+        ),
+    ]
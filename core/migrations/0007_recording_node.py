@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_websubsubscription'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recording',
+            name='node',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
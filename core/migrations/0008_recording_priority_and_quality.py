@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_recording_node'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='monitoringtask',
+            name='priority',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Низкий'), (1, 'Обычный'), (2, 'Высокий')], default=1),
+        ),
+        migrations.AddField(
+            model_name='recording',
+            name='quality',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_recording_priority_and_quality'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recording',
+            name='waveform_path',
+            field=models.FileField(blank=True, null=True, upload_to='recordings/waveforms/'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_recording_waveform_path'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='livestream',
+            index=models.Index(fields=['-actual_start_time'], name='live_streams_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='livestream',
+            index=models.Index(fields=['is_active', '-actual_start_time'], name='live_streams_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='livestream',
+            index=models.Index(fields=['is_recording', '-actual_start_time'], name='live_streams_recording_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recording',
+            index=models.Index(fields=['-created_at'], name='recordings_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recording',
+            index=models.Index(fields=['is_completed', '-created_at'], name='recordings_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recording',
+            index=models.Index(fields=['recording_started'], name='recordings_started_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_stream_and_recording_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StreamEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(choices=[('went_live', 'Начало эфира'), ('detected', 'Обнаружена'), ('recording_queued', 'Запись в очереди'), ('recording_admitted', 'Запись допущена'), ('recorder_started', 'Узел записи принял задачу'), ('capture_started', 'Запущен ytarchive'), ('capture_finished', 'ytarchive завершён'), ('conversion_finished', 'Конвертация в MP3 завершена'), ('recording_saved', 'Запись сохранена'), ('stream_ended', 'Эфир завершён')], max_length=32)),
+                ('at', models.DateTimeField()),
+                ('live_stream', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='core.livestream')),
+            ],
+            options={
+                'verbose_name': 'Stream Event',
+                'verbose_name_plural': 'Stream Events',
+                'db_table': 'stream_events',
+                'ordering': ['at'],
+                'indexes': [models.Index(fields=['live_stream', 'at'], name='stream_events_stream_idx'), models.Index(fields=['at'], name='stream_events_at_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_streamevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recording',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='streamevent',
+            name='event',
+            field=models.CharField(choices=[('went_live', 'Начало эфира'), ('detected', 'Обнаружена'), ('recording_queued', 'Запись в очереди'), ('recording_admitted', 'Запись допущена'), ('recording_retried', 'Повтор записи'), ('recorder_started', 'Узел записи принял задачу'), ('capture_started', 'Запущен ytarchive'), ('capture_finished', 'ytarchive завершён'), ('conversion_finished', 'Конвертация в MP3 завершена'), ('recording_saved', 'Запись сохранена'), ('stream_ended', 'Эфир завершён')], max_length=32),
+        ),
+        migrations.CreateModel(
+            name='RecordingPart',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveSmallIntegerField()),
+                ('video_path', models.FileField(upload_to='recordings/videos/')),
+                ('file_size', models.BigIntegerField(default=0)),
+                ('is_complete', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('recording', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='parts', to='core.recording')),
+            ],
+            options={
+                'verbose_name': 'Recording Part',
+                'verbose_name_plural': 'Recording Parts',
+                'db_table': 'recording_parts',
+                'ordering': ['index'],
+                'unique_together': {('recording', 'index')},
+            },
+        ),
+    ]
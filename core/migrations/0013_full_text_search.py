@@ -0,0 +1,149 @@
+from django.db import migrations
+
+# Full-text index over live stream titles, descriptions and channel titles, kept
+# current by triggers: an FTS5 table on SQLite, a tsvector table with a GIN
+# index on PostgreSQL. Other databases fall back to icontains in core/search.py.
+
+SQLITE_SETUP = [
+    """
+    CREATE VIRTUAL TABLE live_streams_fts USING fts5(
+        title, description, channel_title, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER live_streams_fts_insert AFTER INSERT ON live_streams BEGIN
+        INSERT INTO live_streams_fts (rowid, title, description, channel_title)
+        VALUES (new.id, new.title, new.description,
+                (SELECT title FROM youtube_channels WHERE id = new.channel_id));
+    END
+    """,
+    """
+    CREATE TRIGGER live_streams_fts_update AFTER UPDATE OF title, description, channel_id ON live_streams
+    WHEN old.title IS NOT new.title OR old.description IS NOT new.description
+         OR old.channel_id IS NOT new.channel_id
+    BEGIN
+        DELETE FROM live_streams_fts WHERE rowid = old.id;
+        INSERT INTO live_streams_fts (rowid, title, description, channel_title)
+        VALUES (new.id, new.title, new.description,
+                (SELECT title FROM youtube_channels WHERE id = new.channel_id));
+    END
+    """,
+    """
+    CREATE TRIGGER live_streams_fts_delete AFTER DELETE ON live_streams BEGIN
+        DELETE FROM live_streams_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER youtube_channels_fts_update AFTER UPDATE OF title ON youtube_channels
+    WHEN old.title IS NOT new.title
+    BEGIN
+        UPDATE live_streams_fts SET channel_title = new.title
+        WHERE rowid IN (SELECT id FROM live_streams WHERE channel_id = new.id);
+    END
+    """,
+    """
+    INSERT INTO live_streams_fts (rowid, title, description, channel_title)
+    SELECT s.id, s.title, s.description, c.title
+    FROM live_streams s JOIN youtube_channels c ON c.id = s.channel_id
+    """,
+]
+
+SQLITE_TEARDOWN = [
+    'DROP TRIGGER IF EXISTS youtube_channels_fts_update',
+    'DROP TRIGGER IF EXISTS live_streams_fts_delete',
+    'DROP TRIGGER IF EXISTS live_streams_fts_update',
+    'DROP TRIGGER IF EXISTS live_streams_fts_insert',
+    'DROP TABLE IF EXISTS live_streams_fts',
+]
+
+# Stream title weighs more than the channel title, which weighs more than the description
+DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce({stream}.title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce({channel}.title, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce({stream}.description, '')), 'C')"
+)
+
+POSTGRES_SETUP = [
+    """
+    CREATE TABLE live_streams_search (
+        stream_id bigint PRIMARY KEY REFERENCES live_streams (id) ON DELETE CASCADE,
+        document tsvector NOT NULL
+    )
+    """,
+    'CREATE INDEX live_streams_search_document_idx ON live_streams_search USING GIN (document)',
+    f"""
+    CREATE FUNCTION live_streams_search_refresh() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO live_streams_search (stream_id, document)
+        SELECT NEW.id, {DOCUMENT.format(stream='NEW', channel='c')}
+        FROM youtube_channels c WHERE c.id = NEW.channel_id
+        ON CONFLICT (stream_id) DO UPDATE SET document = EXCLUDED.document;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER live_streams_search_insert AFTER INSERT ON live_streams
+    FOR EACH ROW EXECUTE FUNCTION live_streams_search_refresh()
+    """,
+    """
+    CREATE TRIGGER live_streams_search_update AFTER UPDATE OF title, description, channel_id ON live_streams
+    FOR EACH ROW
+    WHEN (OLD.title IS DISTINCT FROM NEW.title OR OLD.description IS DISTINCT FROM NEW.description
+          OR OLD.channel_id IS DISTINCT FROM NEW.channel_id)
+    EXECUTE FUNCTION live_streams_search_refresh()
+    """,
+    f"""
+    CREATE FUNCTION youtube_channels_search_refresh() RETURNS trigger AS $$
+    BEGIN
+        UPDATE live_streams_search search
+        SET document = {DOCUMENT.format(stream='s', channel='NEW')}
+        FROM live_streams s
+        WHERE s.id = search.stream_id AND s.channel_id = NEW.id;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER youtube_channels_search_update AFTER UPDATE OF title ON youtube_channels
+    FOR EACH ROW WHEN (OLD.title IS DISTINCT FROM NEW.title)
+    EXECUTE FUNCTION youtube_channels_search_refresh()
+    """,
+    f"""
+    INSERT INTO live_streams_search (stream_id, document)
+    SELECT s.id, {DOCUMENT.format(stream='s', channel='c')}
+    FROM live_streams s JOIN youtube_channels c ON c.id = s.channel_id
+    """,
+]
+
+POSTGRES_TEARDOWN = [
+    'DROP TRIGGER IF EXISTS youtube_channels_search_update ON youtube_channels',
+    'DROP FUNCTION IF EXISTS youtube_channels_search_refresh()',
+    'DROP TRIGGER IF EXISTS live_streams_search_update ON live_streams',
+    'DROP TRIGGER IF EXISTS live_streams_search_insert ON live_streams',
+    'DROP FUNCTION IF EXISTS live_streams_search_refresh()',
+    'DROP TABLE IF EXISTS live_streams_search',
+]
+
+
+def create_search_index(apps, schema_editor):
+    statements = {'sqlite': SQLITE_SETUP, 'postgresql': POSTGRES_SETUP}
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    statements = {'sqlite': SQLITE_TEARDOWN, 'postgresql': POSTGRES_TEARDOWN}
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_recording_parts_and_attempts'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_full_text_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChannelStatSample',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.PositiveIntegerField(choices=[(60, 'Минута'), (3600, 'Час'), (86400, 'День')])),
+                ('bucket', models.DateTimeField()),
+                ('subscriber_count', models.BigIntegerField(null=True)),
+                ('view_count', models.BigIntegerField(null=True)),
+                ('video_count', models.IntegerField(null=True)),
+                ('live_minutes', models.PositiveIntegerField(default=0)),
+                ('channel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stat_samples', to='core.youtubechannel')),
+            ],
+            options={
+                'verbose_name': 'Channel Stat Sample',
+                'verbose_name_plural': 'Channel Stat Samples',
+                'db_table': 'channel_stat_samples',
+                'indexes': [models.Index(fields=['resolution', 'bucket'], name='channel_stat_samples_age_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='channelstatsample',
+            constraint=models.UniqueConstraint(fields=('channel', 'resolution', 'bucket'), name='channel_stat_samples_bucket_unique'),
+        ),
+    ]
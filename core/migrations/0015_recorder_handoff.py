@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_channelstatsample'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recordingpart',
+            name='capture_finished',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='recordingpart',
+            name='capture_started',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='streamevent',
+            name='event',
+            field=models.CharField(choices=[('went_live', 'Начало эфира'), ('detected', 'Обнаружена'), ('recording_queued', 'Запись в очереди'), ('recording_admitted', 'Запись допущена'), ('recording_retried', 'Повтор записи'), ('recording_handed_off', 'Передача другому узлу'), ('recorder_started', 'Узел записи принял задачу'), ('capture_started', 'Запущен ytarchive'), ('capture_finished', 'ytarchive завершён'), ('conversion_finished', 'Конвертация в MP3 завершена'), ('recording_saved', 'Запись сохранена'), ('stream_ended', 'Эфир завершён')], max_length=32),
+        ),
+    ]
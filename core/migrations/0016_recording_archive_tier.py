@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_recorder_handoff'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recording',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='recording',
+            name='audio_path',
+            field=models.FileField(blank=True, max_length=255, null=True, upload_to='recordings/audio/'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_recording_archive_tier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recording',
+            name='max_quality',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
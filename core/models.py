@@ -2,6 +2,10 @@ from django.db import models
 import os
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from django.urls import reverse
+from django.conf import settings
+
+from .live import playlist_url
 
 
 class YouTubeChannel(models.Model):
@@ -10,9 +14,14 @@ class YouTubeChannel(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     thumbnail_url = models.URLField(blank=True)
+    # Locally cached WebP variants of thumbnail_url and the upstream URL they were made from
+    thumbnail_1x = models.FileField(upload_to='thumbnails/', blank=True)
+    thumbnail_2x = models.FileField(upload_to='thumbnails/', blank=True)
+    thumbnail_cached_from = models.URLField(blank=True)
     subscriber_count = models.BigIntegerField(default=0)
     view_count = models.BigIntegerField(default=0)
     video_count = models.IntegerField(default=0)
+    last_checked_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -32,8 +41,37 @@ class YouTubeChannel(models.Model):
     def current_live_count(self):
         return self.live_streams.filter(is_active=True).count()
 
+    @property
+    def thumbnail_needs_refresh(self):
+        return bool(self.thumbnail_url) and (
+            self.thumbnail_url != self.thumbnail_cached_from or not self.thumbnail_1x
+        )
+
+    @property
+    def thumbnail_1x_url(self):
+        return self._cached_thumbnail_url(self.thumbnail_1x)
+
+    @property
+    def thumbnail_2x_url(self):
+        return self._cached_thumbnail_url(self.thumbnail_2x)
+
+    def _cached_thumbnail_url(self, field):
+        """URL of a cached thumbnail variant served with long cache headers"""
+        if not field:
+            return ''
+        return reverse('thumbnail', args=[os.path.basename(field.name)])
+
 
 class MonitoringTask(models.Model):
+    PRIORITY_LOW = 0
+    PRIORITY_NORMAL = 1
+    PRIORITY_HIGH = 2
+    PRIORITY_CHOICES = [
+        (PRIORITY_LOW, 'Низкий'),
+        (PRIORITY_NORMAL, 'Обычный'),
+        (PRIORITY_HIGH, 'Высокий'),
+    ]
+
     channel = models.OneToOneField(
         YouTubeChannel,
         on_delete=models.CASCADE,
@@ -43,6 +81,7 @@ class MonitoringTask(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     recordings_count = models.PositiveIntegerField(default=0)
+    priority = models.PositiveSmallIntegerField(choices=PRIORITY_CHOICES, default=PRIORITY_NORMAL)
 
     class Meta:
         db_table = 'monitoring_tasks'
@@ -53,6 +92,79 @@ class MonitoringTask(models.Model):
         return f"Monitoring: {self.channel.handle}"
 
 
+class WebSubSubscription(models.Model):
+    channel = models.OneToOneField(
+        YouTubeChannel,
+        on_delete=models.CASCADE,
+        related_name='websub_subscription'
+    )
+    secret = models.CharField(max_length=64)
+    is_active = models.BooleanField(default=True)
+    requested_at = models.DateTimeField(null=True, blank=True)
+    verified_at = models.DateTimeField(null=True, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'websub_subscriptions'
+        verbose_name = 'WebSub Subscription'
+        verbose_name_plural = 'WebSub Subscriptions'
+
+    def __str__(self):
+        return f"WebSub: {self.channel.handle}"
+
+    @property
+    def topic(self):
+        return f"https://www.youtube.com/xml/feeds/videos.xml?channel_id={self.channel.channel_id}"
+
+
+class ChannelStatSample(models.Model):
+    """
+    One bucket of a channel's statistics history, see core/history.py
+
+    Counts are the last values seen in the bucket (null when not sampled);
+    live_minutes sums the minutes streams of the channel were live.
+    """
+    MINUTE = 60
+    HOUR = 3600
+    DAY = 86400
+    RESOLUTION_CHOICES = [
+        (MINUTE, 'Минута'),
+        (HOUR, 'Час'),
+        (DAY, 'День'),
+    ]
+
+    channel = models.ForeignKey(
+        YouTubeChannel,
+        on_delete=models.CASCADE,
+        related_name='stat_samples'
+    )
+    resolution = models.PositiveIntegerField(choices=RESOLUTION_CHOICES)
+    bucket = models.DateTimeField()
+    subscriber_count = models.BigIntegerField(null=True)
+    view_count = models.BigIntegerField(null=True)
+    video_count = models.IntegerField(null=True)
+    live_minutes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'channel_stat_samples'
+        verbose_name = 'Channel Stat Sample'
+        verbose_name_plural = 'Channel Stat Samples'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['channel', 'resolution', 'bucket'],
+                name='channel_stat_samples_bucket_unique'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['resolution', 'bucket'], name='channel_stat_samples_age_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.channel_id} @ {self.bucket} ({self.get_resolution_display()})"
+
+
 class LiveStream(models.Model):
     channel = models.ForeignKey(
         YouTubeChannel,
@@ -75,6 +187,11 @@ class LiveStream(models.Model):
         verbose_name = 'Live Stream'
         verbose_name_plural = 'Live Streams'
         ordering = ['-actual_start_time']
+        indexes = [
+            models.Index(fields=['-actual_start_time'], name='live_streams_start_idx'),
+            models.Index(fields=['is_active', '-actual_start_time'], name='live_streams_active_idx'),
+            models.Index(fields=['is_recording', '-actual_start_time'], name='live_streams_recording_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -88,6 +205,57 @@ class LiveStream(models.Model):
         return None
 
 
+class StreamEvent(models.Model):
+    """One timestamped step in the lifecycle of a live stream; rows are only ever appended"""
+    WENT_LIVE = 'went_live'
+    DETECTED = 'detected'
+    RECORDING_QUEUED = 'recording_queued'
+    RECORDING_ADMITTED = 'recording_admitted'
+    RECORDING_RETRIED = 'recording_retried'
+    RECORDING_HANDED_OFF = 'recording_handed_off'
+    RECORDER_STARTED = 'recorder_started'
+    CAPTURE_STARTED = 'capture_started'
+    CAPTURE_FINISHED = 'capture_finished'
+    CONVERSION_FINISHED = 'conversion_finished'
+    RECORDING_SAVED = 'recording_saved'
+    STREAM_ENDED = 'stream_ended'
+    EVENT_CHOICES = [
+        (WENT_LIVE, 'Начало эфира'),
+        (DETECTED, 'Обнаружена'),
+        (RECORDING_QUEUED, 'Запись в очереди'),
+        (RECORDING_ADMITTED, 'Запись допущена'),
+        (RECORDING_RETRIED, 'Повтор записи'),
+        (RECORDING_HANDED_OFF, 'Передача другому узлу'),
+        (RECORDER_STARTED, 'Узел записи принял задачу'),
+        (CAPTURE_STARTED, 'Запущен ytarchive'),
+        (CAPTURE_FINISHED, 'ytarchive завершён'),
+        (CONVERSION_FINISHED, 'Конвертация в MP3 завершена'),
+        (RECORDING_SAVED, 'Запись сохранена'),
+        (STREAM_ENDED, 'Эфир завершён'),
+    ]
+
+    live_stream = models.ForeignKey(
+        LiveStream,
+        on_delete=models.CASCADE,
+        related_name='events'
+    )
+    event = models.CharField(max_length=32, choices=EVENT_CHOICES)
+    at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'stream_events'
+        verbose_name = 'Stream Event'
+        verbose_name_plural = 'Stream Events'
+        ordering = ['at']
+        indexes = [
+            models.Index(fields=['live_stream', 'at'], name='stream_events_stream_idx'),
+            models.Index(fields=['at'], name='stream_events_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_event_display()}: {self.at}"
+
+
 class Recording(models.Model):
     live_stream = models.OneToOneField(
         LiveStream,
@@ -99,8 +267,16 @@ class Recording(models.Model):
         null=True,
         blank=True
     )
+    # MP3, or Opus once moved to the archive tier, see core/tiering.py
     audio_path = models.FileField(
         upload_to='recordings/audio/',
+        max_length=255,
+        null=True,
+        blank=True
+    )
+    # Waveform peaks and MP3 seek index, see core/waveform.py
+    waveform_path = models.FileField(
+        upload_to='recordings/waveforms/',
         null=True,
         blank=True
     )
@@ -109,6 +285,16 @@ class Recording(models.Model):
     recording_started = models.DateTimeField(auto_now_add=True)
     recording_finished = models.DateTimeField(null=True, blank=True)
     is_completed = models.BooleanField(default=False)
+    # Recorder node the job is assigned to
+    node = models.CharField(max_length=100, blank=True)
+    # Best ytarchive quality admission allows for the recording
+    max_quality = models.CharField(max_length=100, blank=True)
+    # ytarchive quality of the latest capture, stepped down from max_quality to fit the node's link
+    quality = models.CharField(max_length=100, blank=True)
+    # Number of record_stream runs, including retries after failures
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # When the audio was moved to the archive storage tier
+    archived_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -116,6 +302,11 @@ class Recording(models.Model):
         verbose_name = 'Recording'
         verbose_name_plural = 'Recordings'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='recordings_created_idx'),
+            models.Index(fields=['is_completed', '-created_at'], name='recordings_completed_idx'),
+            models.Index(fields=['recording_started'], name='recordings_started_idx'),
+        ]
 
     def __str__(self):
         return f"Recording: {self.live_stream.title}"
@@ -128,6 +319,11 @@ class Recording(models.Model):
                 os.remove(self.original_video_path.path)
             if self.audio_path and os.path.isfile(self.audio_path.path):
                 os.remove(self.audio_path.path)
+            if self.waveform_path and os.path.isfile(self.waveform_path.path):
+                os.remove(self.waveform_path.path)
+            for part in self.parts.all():
+                if part.video_path and os.path.isfile(part.video_path.path):
+                    os.remove(part.video_path.path)
         except Exception as e:
             # Log error but continue with deletion
             import logging
@@ -140,4 +336,52 @@ class Recording(models.Model):
     def download_url(self):
         if self.audio_path and self.is_completed:
             return self.audio_path.url
-        return None
\ No newline at end of file
+        return None
+
+    @property
+    def audio_format(self):
+        """File type shown on download buttons, e.g. MP3 or OPUS"""
+        if self.audio_path:
+            return os.path.splitext(self.audio_path.name)[1].lstrip('.').upper()
+        return ''
+
+    @property
+    def live_url(self):
+        """HLS playlist of the audio recorded so far, while the recording is in progress"""
+        if settings.LIVE_HLS_ENABLED and not self.is_completed:
+            return playlist_url(self.id)
+        return None
+
+    @property
+    def waveform_url(self):
+        if self.waveform_path and self.is_completed:
+            return self.waveform_path.url
+        return None
+
+
+class RecordingPart(models.Model):
+    """Capture of one record_stream attempt; the parts are joined when the recording is finished"""
+    recording = models.ForeignKey(
+        Recording,
+        on_delete=models.CASCADE,
+        related_name='parts'
+    )
+    index = models.PositiveSmallIntegerField()
+    video_path = models.FileField(upload_to='recordings/videos/')
+    file_size = models.BigIntegerField(default=0)
+    # ytarchive exited cleanly; otherwise the capture ends where the attempt failed
+    is_complete = models.BooleanField(default=False)
+    # Wall-clock span of the capture; overlapping captures of a handoff are trimmed by it
+    capture_started = models.DateTimeField(null=True, blank=True)
+    capture_finished = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'recording_parts'
+        verbose_name = 'Recording Part'
+        verbose_name_plural = 'Recording Parts'
+        ordering = ['index']
+        unique_together = [('recording', 'index')]
+
+    def __str__(self):
+        return f"Part {self.index} of {self.recording_id}"
@@ -0,0 +1,121 @@
+import logging
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+
+from .locks import get_redis
+
+logger = logging.getLogger(__name__)
+
+# YouTube quota resets at midnight Pacific time
+QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')
+
+# Quota cost in units of each YouTube Data API method we call
+QUOTA_COSTS = {
+    'search.list': 100,
+    'channels.list': 1,
+    'videos.list': 1,
+}
+
+
+class QuotaExhausted(Exception):
+    """Raised when a call would exceed the daily YouTube API quota"""
+
+
+def cost(method):
+    return QUOTA_COSTS.get(method, 1)
+
+
+def _quota_day(now=None):
+    return (now or datetime.now(QUOTA_TIMEZONE)).astimezone(QUOTA_TIMEZONE).date()
+
+
+def ledger_key(key_id, now=None):
+    """Redis key of today's ledger for one API key"""
+    return f'livestreamtrap:quota:{_quota_day(now).isoformat()}:{key_id}'
+
+
+def seconds_until_reset(now=None):
+    """Seconds left until the quota resets at midnight Pacific time"""
+    now = (now or datetime.now(QUOTA_TIMEZONE)).astimezone(QUOTA_TIMEZONE)
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), QUOTA_TIMEZONE)
+    return max(1.0, (midnight - now).total_seconds())
+
+
+def daily_budget():
+    """Total units per day across all API keys in the pool"""
+    from .api_keys import get_api_keys
+    return settings.YOUTUBE_DAILY_QUOTA * len(get_api_keys())
+
+
+def spent_by_key():
+    """Quota units spent today by each API key"""
+    from .api_keys import get_api_keys
+    keys = get_api_keys()
+    values = get_redis().mget([ledger_key(key.id) for key in keys]) if keys else []
+    return {key.id: int(value or 0) for key, value in zip(keys, values)}
+
+
+def spent():
+    """Quota units spent today across all API keys"""
+    return sum(spent_by_key().values())
+
+
+def remaining():
+    """Quota units left today across all API keys"""
+    return max(0, daily_budget() - spent())
+
+
+def charge(method, key_id):
+    """
+    Charge one API key's ledger for one call of `method` and return its total today.
+    """
+    key = ledger_key(key_id)
+    pipe = get_redis().pipeline()
+    pipe.incrby(key, cost(method))
+    pipe.expire(key, int(seconds_until_reset()) + 3600)
+    total, _ = pipe.execute()
+    return total
+
+
+def can_spend(units, spent_units, critical=False):
+    """
+    Check whether `units` fit into a single key's budget given what it already spent.
+
+    Non-critical calls (routine polling) may not dip into the reserve that is kept
+    for recording-critical calls.
+    """
+    limit = settings.YOUTUBE_DAILY_QUOTA
+    if not critical:
+        limit -= settings.YOUTUBE_QUOTA_RESERVE
+    return spent_units + units <= limit
+
+
+def mark_exhausted(key_id):
+    """Record that the API itself reported the quota of a key as exceeded"""
+    get_redis().set(
+        ledger_key(key_id),
+        settings.YOUTUBE_DAILY_QUOTA,
+        ex=int(seconds_until_reset()) + 3600
+    )
+    logger.warning(f"YouTube API key {key_id} reported quotaExceeded, marked as exhausted until reset")
+
+
+def poll_interval(channel_count, method='search.list'):
+    """
+    Minimum interval in seconds between two polls of the same channel.
+
+    The non-reserved remaining budget of all keys is spread evenly over the rest
+    of the quota day, so polling slows down as the budget shrinks instead of
+    stopping at noon. Returns None when no polling budget is left.
+    """
+    budget = sum(
+        max(0, settings.YOUTUBE_DAILY_QUOTA - settings.YOUTUBE_QUOTA_RESERVE - units)
+        for units in spent_by_key().values()
+    )
+    if budget < cost(method):
+        return None
+    units_per_second = budget / seconds_until_reset()
+    interval = channel_count * cost(method) / units_per_second
+    return max(settings.MIN_CHANNEL_POLL_INTERVAL, interval)
@@ -0,0 +1,352 @@
+import logging
+import shutil
+import signal
+import threading
+import time
+
+import psutil
+from django.conf import settings
+
+from .locks import get_redis
+from .models import Recording, StreamEvent
+from . import timeline
+
+logger = logging.getLogger(__name__)
+
+NODES_KEY = 'livestreamtrap:recorders'
+
+# ytarchive quality formats from best to lightest with their expected download
+# rate in bytes per second; each format falls back to lower variants if missing
+QUALITY_LADDER = [
+    ('best', 1_000_000),
+    ('720p60/720p/480p/360p/audio_only', 500_000),
+    ('480p/360p/audio_only', 160_000),
+    ('360p/240p/144p/audio_only', 90_000),
+    ('audio_only', 20_000),
+]
+
+
+def node_key(node):
+    return f'livestreamtrap:recorder:{node}'
+
+
+def active_key(node):
+    return f'livestreamtrap:recorder:{node}:active'
+
+
+def draining_key(node):
+    return f'livestreamtrap:recorder:{node}:draining'
+
+
+def handoff_key(recording_id):
+    return f'livestreamtrap:handoff:{recording_id}'
+
+
+def queue_name(node):
+    """Celery queue consumed only by the worker of one recorder node"""
+    return f'recorder.{node}'
+
+
+def current_node():
+    return settings.RECORDER_NODE_NAME
+
+
+def recording_started(recording_id, node=None):
+    """Count a recording against a node's slots, from dispatch until it finishes"""
+    get_redis().sadd(active_key(node or current_node()), recording_id)
+
+
+def recording_finished(recording_id, node=None):
+    get_redis().srem(active_key(node or current_node()), recording_id)
+
+
+def reset_node(node):
+    """Forget the recordings and the drain of a previous run of a node"""
+    get_redis().delete(active_key(node), draining_key(node))
+
+
+def drain(node):
+    """Stop placing new recordings on a node; the ones it is running are left alone"""
+    get_redis().set(draining_key(node), 1)
+
+
+def undrain(node):
+    get_redis().delete(draining_key(node))
+
+
+def is_draining(node):
+    return bool(get_redis().exists(draining_key(node)))
+
+
+def active_recordings(node):
+    return [int(value) for value in get_redis().smembers(active_key(node))]
+
+
+def begin_handoff(recording_id, from_node, to_node):
+    """
+    Announce that `to_node` is starting a second capture of a recording to replace `from_node`
+
+    The announcement expires if the replacement does not take over in time, so
+    the recording can be handed off again.
+    """
+    redis_client = get_redis()
+    pipe = redis_client.pipeline()
+    pipe.hset(handoff_key(recording_id), mapping={'from': from_node, 'to': to_node})
+    pipe.expire(handoff_key(recording_id), settings.RECORDER_HANDOFF_TIMEOUT + settings.RECORDER_HANDOFF_OVERLAP)
+    pipe.execute()
+
+
+def handoff_pending(recording_id):
+    return bool(get_redis().exists(handoff_key(recording_id)))
+
+
+def end_handoff(recording_id):
+    """Called by the node handing off once its part is saved"""
+    get_redis().delete(handoff_key(recording_id))
+
+
+def take_over(recording_id, from_node, to_node):
+    """
+    Move a recording to the node that has started capturing it.
+
+    Fails when the recording was finished or moved elsewhere in the meantime.
+    """
+    moved = Recording.objects.filter(
+        id=recording_id,
+        node=from_node,
+        is_completed=False
+    ).update(node=to_node)
+    if not moved:
+        return False
+    redis_client = get_redis()
+    pipe = redis_client.pipeline()
+    pipe.hset(handoff_key(recording_id), 'started', time.time())
+    pipe.expire(handoff_key(recording_id), settings.RECORDER_HANDOFF_TIMEOUT + settings.RECORDER_HANDOFF_OVERLAP)
+    pipe.execute()
+    stream_id = Recording.objects.filter(id=recording_id).values_list('live_stream_id', flat=True).first()
+    timeline.record(stream_id, StreamEvent.RECORDING_HANDED_OFF)
+    return True
+
+
+def received_bytes():
+    """Bytes received on the external interfaces of this host"""
+    counters = psutil.net_io_counters(pernic=True)
+    if settings.RECORDER_NETWORK_INTERFACE:
+        return counters[settings.RECORDER_NETWORK_INTERFACE].bytes_recv
+    return sum(nic.bytes_recv for name, nic in counters.items() if not name.startswith('lo'))
+
+
+class Heartbeat(threading.Thread):
+    """
+    Periodically advertise this node's recording capacity in Redis.
+
+    The node hash expires after a few missed beats, which is how the rest of the
+    cluster learns that a node is dead.
+    """
+
+    def __init__(self, node):
+        super().__init__(name='recorder-heartbeat', daemon=True)
+        self.node = node
+        self.stopped = threading.Event()
+        self._last_rx = None
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                self.beat()
+            except Exception as e:
+                logger.error(f"Recorder heartbeat failed: {str(e)}")
+            self.stopped.wait(settings.RECORDER_HEARTBEAT_INTERVAL)
+
+    def beat(self):
+        now = time.time()
+        rx_bytes = received_bytes()
+        rx_rate = 0.0
+        if self._last_rx is not None:
+            last_bytes, last_time = self._last_rx
+            rx_rate = max(0.0, (rx_bytes - last_bytes) / max(now - last_time, 1e-3))
+        self._last_rx = (rx_bytes, now)
+
+        redis_client = get_redis()
+        settings.RECORDINGS_DIR.mkdir(parents=True, exist_ok=True)
+        pipe = redis_client.pipeline()
+        pipe.hset(node_key(self.node), mapping={
+            'free_disk': shutil.disk_usage(settings.RECORDINGS_DIR).free,
+            'rx_bytes_per_sec': int(rx_rate),
+            'active': redis_client.scard(active_key(self.node)),
+            'max_recordings': settings.RECORDER_MAX_RECORDINGS,
+            'link_capacity': settings.RECORDER_LINK_CAPACITY_MBPS * 125_000,
+            'updated': now,
+        })
+        pipe.expire(node_key(self.node), settings.RECORDER_HEARTBEAT_INTERVAL * 3)
+        pipe.zadd(NODES_KEY, {self.node: now})
+        pipe.execute()
+
+    def stop(self):
+        self.stopped.set()
+
+
+class HandoffWatch(threading.Thread):
+    """
+    Coordinate the handoff of a running ytarchive capture between two nodes.
+
+    On the replacement node (`handoff_from` set) it waits for the first audio
+    fragments of the new capture and then takes the recording over. On the node
+    being replaced it stops ytarchive with SIGINT, which makes it mux what it
+    has, once the replacement has been capturing for RECORDER_HANDOFF_OVERLAP
+    seconds.
+    """
+
+    def __init__(self, recording_id, node, process, fragments_path, handoff_from=None):
+        super().__init__(name=f'recording-{recording_id}-handoff', daemon=True)
+        self.recording_id = recording_id
+        self.node = node
+        self.process = process
+        self.fragments_path = fragments_path
+        self.handoff_from = handoff_from
+        self.stopped = threading.Event()
+        # Wall-clock bounds of the audio this capture contributes, used to trim the overlap
+        self.capturing_since = None
+        self.handed_off_at = None
+        self.took_over = False
+
+    def run(self):
+        try:
+            if self.handoff_from and not self.wait_for_capture():
+                return
+            self.watch_for_replacement()
+        except Exception as e:
+            logger.error(f"Handoff watch of recording {self.recording_id} failed: {str(e)}")
+
+    def wait_for_capture(self):
+        deadline = time.time() + settings.RECORDER_HANDOFF_TIMEOUT
+        while not self.stopped.wait(1):
+            if self.fragments_path.exists() and self.fragments_path.stat().st_size > 0:
+                self.capturing_since = time.time()
+                self.took_over = take_over(self.recording_id, self.handoff_from, self.node)
+                if self.took_over:
+                    logger.info(f"Node {self.node} took recording {self.recording_id} over from {self.handoff_from}")
+                    return True
+                logger.info(f"Recording {self.recording_id} is no longer on {self.handoff_from}, dropping the handoff")
+                break
+            if time.time() > deadline:
+                logger.warning(f"Handoff capture of recording {self.recording_id} did not start in time")
+                break
+        self.interrupt()
+        return False
+
+    def watch_for_replacement(self):
+        redis_client = get_redis()
+        while not self.stopped.wait(1):
+            handoff = redis_client.hgetall(handoff_key(self.recording_id))
+            if handoff.get(b'from', b'').decode() != self.node or b'started' not in handoff:
+                continue
+            if time.time() >= float(handoff[b'started']) + settings.RECORDER_HANDOFF_OVERLAP:
+                logger.info(f"Recording {self.recording_id} handed off, stopping the capture on {self.node}")
+                self.handed_off_at = time.time()
+                self.interrupt()
+                return
+
+    def interrupt(self):
+        if self.process.poll() is None:
+            self.process.send_signal(signal.SIGINT)
+
+    def stop(self):
+        self.stopped.set()
+
+
+def live_nodes():
+    """Capacity reports of all nodes with a fresh heartbeat, keyed by node name"""
+    redis_client = get_redis()
+    nodes = {}
+    for raw_name in redis_client.zrange(NODES_KEY, 0, -1):
+        name = raw_name.decode()
+        data = redis_client.hgetall(node_key(name))
+        if not data:
+            # Heartbeat expired: the node is dead
+            redis_client.zrem(NODES_KEY, name)
+            continue
+        info = {key.decode(): float(value) for key, value in data.items()}
+        # Slots are counted live so that a burst of dispatches between heartbeats spreads out
+        info['active'] = redis_client.scard(active_key(name))
+        info['draining'] = redis_client.exists(draining_key(name))
+        nodes[name] = info
+    return nodes
+
+
+def node_load(info):
+    """Load of a node between 0 and 1, the busier of its recording slots and its link"""
+    slots = info['active'] / max(info['max_recordings'], 1)
+    link = info['rx_bytes_per_sec'] / max(info['link_capacity'], 1)
+    return max(slots, link)
+
+
+def expected_rate(quality):
+    """Expected download rate of a quality format in bytes per second"""
+    for ladder_quality, rate in QUALITY_LADDER:
+        if ladder_quality == quality:
+            return rate
+    return QUALITY_LADDER[0][1]
+
+
+def link_headroom(node, info, exclude_recording=None):
+    """
+    Bytes per second a node can still download without saturating its link.
+
+    Uses the larger of the measured throughput and the expected rate of the
+    recordings already placed on the node, because the measurement lags
+    behind recordings that were dispatched a moment ago.
+    """
+    active_ids = [int(value) for value in get_redis().smembers(active_key(node))]
+    # Recordings that have not started capturing yet are counted at their admission ceiling
+    qualities = Recording.objects.filter(id__in=active_ids).exclude(
+        id=exclude_recording
+    ).values_list('quality', 'max_quality')
+    committed = sum(
+        expected_rate(quality or max_quality or QUALITY_LADDER[0][0]) for quality, max_quality in qualities
+    )
+    budget = info['link_capacity'] * settings.RECORDER_LINK_UTILIZATION
+    return budget - max(info['rx_bytes_per_sec'], committed)
+
+
+def select_quality(node, ceiling=None, recording_id=None):
+    """
+    Pick the best quality, no better than `ceiling`, that fits the node's link headroom.
+
+    Falls back to the lightest format when even that does not fit; admission
+    keeps such nodes from getting new recordings in the first place.
+    """
+    info = live_nodes().get(node)
+    qualities = [quality for quality, _ in QUALITY_LADDER]
+    start = qualities.index(ceiling) if ceiling in qualities else 0
+    if info is None:
+        return qualities[start]
+
+    headroom = link_headroom(node, info, exclude_recording=recording_id)
+    for quality, rate in QUALITY_LADDER[start:]:
+        if rate <= headroom:
+            return quality
+    return QUALITY_LADDER[-1][0]
+
+
+def choose_node(exclude=()):
+    """
+    Pick the least-loaded live node that is not draining and has a free slot,
+    enough disk and room on its link for at least an audio-only capture.
+
+    Returns None when no node can take another recording.
+    """
+    min_free_disk = settings.RECORDER_MIN_FREE_DISK_GB * 1024 ** 3
+    min_rate = QUALITY_LADDER[-1][1]
+    candidates = [
+        (node_load(info), -info['free_disk'], name)
+        for name, info in live_nodes().items()
+        if name not in exclude
+        and not info['draining']
+        and info['active'] < info['max_recordings']
+        and info['free_disk'] >= min_free_disk
+        and link_headroom(name, info) >= min_rate
+    ]
+    if not candidates:
+        return None
+    return min(candidates)[2]
@@ -0,0 +1,79 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import LiveStream
+
+# Side tables created by migration 0013_full_text_search and kept current by database triggers
+SQLITE_FTS_TABLE = 'live_streams_fts'
+POSTGRES_SEARCH_TABLE = 'live_streams_search'
+# Text search configuration: streams are in Russian and English, so no stemming
+POSTGRES_TS_CONFIG = 'simple'
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def words(query):
+    return WORD_RE.findall(query.lower())
+
+
+def fts5_query(terms):
+    """FTS5 MATCH expression: all words as prefixes, which also covers Russian word endings"""
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def tsquery(terms):
+    """to_tsquery expression: all words as prefixes"""
+    return ' & '.join(f"'{term}':*" for term in terms)
+
+
+def search_ids(query, limit):
+    """
+    Return ids of live streams matching `query`, best match first.
+
+    Searches stream titles, descriptions and channel titles through the full-text
+    index of the database. Returns None when the backend has no index, so the
+    caller can fall back to a plain scan.
+    """
+    terms = words(query)
+    if not terms:
+        return []
+
+    if connection.vendor == 'sqlite':
+        sql = (
+            f'SELECT rowid FROM {SQLITE_FTS_TABLE} '
+            f'WHERE {SQLITE_FTS_TABLE} MATCH %s ORDER BY rank LIMIT %s'
+        )
+        params = [fts5_query(terms), limit]
+    elif connection.vendor == 'postgresql':
+        sql = (
+            f'SELECT stream_id FROM {POSTGRES_SEARCH_TABLE}, '
+            f"to_tsquery('{POSTGRES_TS_CONFIG}', %s) query "
+            f'WHERE document @@ query ORDER BY ts_rank(document, query) DESC LIMIT %s'
+        )
+        params = [tsquery(terms), limit]
+    else:
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_streams(query, limit):
+    """Live streams matching `query` in rank order, with their channel and recording"""
+    streams = LiveStream.objects.select_related('channel', 'recording')
+    ids = search_ids(query, limit)
+    if ids is None:
+        condition = Q()
+        for term in words(query):
+            condition &= (
+                Q(title__icontains=term)
+                | Q(description__icontains=term)
+                | Q(channel__title__icontains=term)
+            )
+        return list(streams.filter(condition)[:limit])
+
+    by_id = streams.in_bulk(ids)
+    return [by_id[stream_id] for stream_id in ids if stream_id in by_id]
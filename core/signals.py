@@ -1,7 +1,31 @@
-from django.db.models.signals import post_migrate
+from django.db import connection
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
 from django.dispatch import receiver
 from django_celery_beat.models import PeriodicTask, IntervalSchedule
+from celery.signals import (
+    celeryd_after_setup,
+    task_prerun,
+    task_postrun,
+    worker_process_shutdown,
+    worker_ready,
+    worker_shutdown,
+    worker_shutting_down,
+)
+from prometheus_client import multiprocess
 import json
+import logging
+import os
+from .metrics import QueryCounter, TASK_DB_QUERIES
+from .models import LiveStream, MonitoringTask, YouTubeChannel
+from .tasks import hand_off_recordings
+from . import recorders, summary
+
+logger = logging.getLogger(__name__)
+
+# Query counters of the Celery tasks currently running in this process
+_task_query_counters = {}
 
 
 @receiver(post_migrate)
@@ -23,4 +47,183 @@ def setup_periodic_tasks(sender, **kwargs):
             'kwargs': json.dumps({}),
             'enabled': True
         }
-    )
\ No newline at end of file
+    )
+
+    # Refresh channel statistics a few times a day
+    stats_schedule, created = IntervalSchedule.objects.get_or_create(
+        every=settings.CHANNEL_STATS_REFRESH_HOURS,
+        period=IntervalSchedule.HOURS,
+    )
+    PeriodicTask.objects.get_or_create(
+        name='Channel statistics refresh',
+        defaults={
+            'interval': stats_schedule,
+            'task': 'core.tasks.refresh_channel_statistics',
+            'args': json.dumps([]),
+            'kwargs': json.dumps({}),
+            'enabled': True
+        }
+    )
+
+    # Renew WebSub leases of monitored channels
+    websub_schedule, created = IntervalSchedule.objects.get_or_create(
+        every=1,
+        period=IntervalSchedule.HOURS,
+    )
+    PeriodicTask.objects.get_or_create(
+        name='WebSub subscription renewal',
+        defaults={
+            'interval': websub_schedule,
+            'task': 'core.tasks.renew_websub_subscriptions',
+            'args': json.dumps([]),
+            'kwargs': json.dumps({}),
+            'enabled': True
+        }
+    )
+
+    # Move recordings away from dead recorder nodes
+    PeriodicTask.objects.get_or_create(
+        name='Orphaned recordings reassignment',
+        defaults={
+            'interval': schedule,
+            'task': 'core.tasks.reassign_orphaned_recordings',
+            'args': json.dumps([]),
+            'kwargs': json.dumps({}),
+            'enabled': True
+        }
+    )
+
+    # Start queued recordings when slots free up
+    PeriodicTask.objects.get_or_create(
+        name='Recording admission',
+        defaults={
+            'interval': schedule,
+            'task': 'core.tasks.admit_recordings',
+            'args': json.dumps([]),
+            'kwargs': json.dumps({}),
+            'enabled': True
+        }
+    )
+
+    # Channel statistics history: live minutes every minute, rollups every hour
+    PeriodicTask.objects.get_or_create(
+        name='Channel activity sampling',
+        defaults={
+            'interval': schedule,
+            'task': 'core.tasks.record_channel_activity',
+            'args': json.dumps([]),
+            'kwargs': json.dumps({}),
+            'enabled': True
+        }
+    )
+    PeriodicTask.objects.get_or_create(
+        name='Channel history rollup',
+        defaults={
+            'interval': websub_schedule,
+            'task': 'core.tasks.rollup_channel_history',
+            'args': json.dumps([]),
+            'kwargs': json.dumps({}),
+            'enabled': True
+        }
+    )
+
+    # Move old recordings to the cheaper storage tier every hour
+    PeriodicTask.objects.get_or_create(
+        name='Old recordings archiving',
+        defaults={
+            'interval': websub_schedule,
+            'task': 'core.tasks.archive_old_recordings',
+            'args': json.dumps([]),
+            'kwargs': json.dumps({}),
+            'enabled': True
+        }
+    )
+
+
+@receiver(post_save, sender=LiveStream)
+@receiver(post_delete, sender=LiveStream)
+@receiver(post_save, sender=MonitoringTask)
+@receiver(post_delete, sender=MonitoringTask)
+def refresh_channel_summary(sender, instance, **kwargs):
+    """Keep the cached home page summary of the affected channel up to date"""
+    channel_id = instance.channel_id
+    transaction.on_commit(lambda: summary.refresh(channel_id))
+
+
+@receiver(post_save, sender=YouTubeChannel)
+@receiver(post_delete, sender=YouTubeChannel)
+def refresh_own_summary(sender, instance, **kwargs):
+    """Add new channels to the cached summary and drop deleted ones"""
+    channel_id = instance.id
+    transaction.on_commit(lambda: summary.refresh(channel_id))
+
+
+@task_prerun.connect
+def start_task_query_count(task_id=None, **kwargs):
+    """Start counting database queries for a Celery task run"""
+    counter = QueryCounter()
+    connection.execute_wrappers.append(counter)
+    _task_query_counters[task_id] = counter
+
+
+@task_postrun.connect
+def finish_task_query_count(task_id=None, task=None, **kwargs):
+    """Report the number of database queries made by a Celery task run"""
+    counter = _task_query_counters.pop(task_id, None)
+    if counter is None:
+        return
+    if counter in connection.execute_wrappers:
+        connection.execute_wrappers.remove(counter)
+    TASK_DB_QUERIES.labels(task.name).observe(counter.count)
+
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(pid=None, **kwargs):
+    """Drop live gauges of an exited worker child from the multiprocess directory"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+@celeryd_after_setup.connect
+def add_recorder_queue(sender, instance, **kwargs):
+    """Make every worker also consume the queue of its own recorder node"""
+    instance.app.amqp.queues.select_add(recorders.queue_name(recorders.current_node()))
+
+
+_heartbeat = None
+
+
+@worker_ready.connect
+def start_recorder_heartbeat(sender=None, **kwargs):
+    """Start advertising this node's recording capacity"""
+    global _heartbeat
+    # Recordings of a previous run of this node are gone with its processes
+    recorders.reset_node(recorders.current_node())
+    _heartbeat = recorders.Heartbeat(recorders.current_node())
+    _heartbeat.start()
+
+
+@worker_shutting_down.connect
+def drain_recorder_node(sender=None, sig=None, how=None, **kwargs):
+    """
+    On a warm shutdown hand the running recordings to other nodes
+
+    The worker waits for its tasks, so each capture stops once its replacement
+    has been recording for the handoff overlap. Without another node they run
+    until the stream ends or the process is killed.
+    """
+    if how != 'Warm':
+        return
+    node = recorders.current_node()
+    try:
+        recorders.drain(node)
+        handed_off = hand_off_recordings(node)
+        logger.info(f"Recorder node {node} is draining, {handed_off} recordings handed off")
+    except Exception as e:
+        logger.error(f"Error draining recorder node {node}: {str(e)}")
+
+
+@worker_shutdown.connect
+def stop_recorder_heartbeat(sender=None, **kwargs):
+    if _heartbeat is not None:
+        _heartbeat.stop()
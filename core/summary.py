@@ -0,0 +1,87 @@
+import json
+import logging
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+from .locks import get_redis
+from .models import YouTubeChannel
+
+logger = logging.getLogger(__name__)
+
+# Hash of channel id -> JSON summary shown on the home page
+SUMMARY_KEY = 'livestreamtrap:channel_summary'
+
+# Update one channel only while the hash exists, so an expired hash is not
+# recreated without its TTL and with a single channel in it
+REFRESH_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+end
+"""
+
+_refresh_script = None
+
+
+def summarize(channels):
+    """Compute the home page summary of the given channels in a single query"""
+    channels = channels.annotate(
+        live=Count('live_streams', filter=Q(live_streams__is_active=True)),
+        recording=Count('live_streams', filter=Q(live_streams__is_recording=True)),
+    ).values('id', 'live', 'recording', 'monitoring_task__is_active')
+    return {
+        row['id']: {
+            'has_task': bool(row['monitoring_task__is_active']),
+            'live_count': row['live'],
+            'recording_count': row['recording'],
+        }
+        for row in channels
+    }
+
+
+def rebuild():
+    """Recompute the summary of every channel and replace the cached hash"""
+    summaries = summarize(YouTubeChannel.objects.all())
+    pipe = get_redis().pipeline()
+    pipe.delete(SUMMARY_KEY)
+    if summaries:
+        pipe.hset(SUMMARY_KEY, mapping={
+            channel_id: json.dumps(summary) for channel_id, summary in summaries.items()
+        })
+        pipe.expire(SUMMARY_KEY, settings.CHANNEL_SUMMARY_TTL)
+    pipe.execute()
+    return summaries
+
+
+def refresh(channel_id):
+    """
+    Update the cached summary of one channel, dropping it if the channel is gone
+
+    Changes that bypass the signals are picked up when the hash expires.
+    """
+    global _refresh_script
+    try:
+        summary = summarize(YouTubeChannel.objects.filter(id=channel_id)).get(channel_id)
+        client = get_redis()
+        if summary is None:
+            client.hdel(SUMMARY_KEY, channel_id)
+        else:
+            # Nothing is written if nothing is cached; the next read rebuilds everything
+            if _refresh_script is None:
+                _refresh_script = client.register_script(REFRESH_SCRIPT)
+            _refresh_script(keys=[SUMMARY_KEY], args=[channel_id, json.dumps(summary)])
+    except Exception as e:
+        logger.error(f"Error refreshing summary of channel {channel_id}: {str(e)}")
+
+
+def get_all():
+    """Return {channel id: summary} for all channels, from cache when possible"""
+    try:
+        cached = get_redis().hgetall(SUMMARY_KEY)
+    except Exception as e:
+        logger.error(f"Error reading channel summary cache: {str(e)}")
+        return summarize(YouTubeChannel.objects.all())
+
+    if not cached:
+        return rebuild()
+    return {int(channel_id): json.loads(summary) for channel_id, summary in cached.items()}
@@ -0,0 +1,237 @@
+import logging
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import googleapiclient.discovery
+import googleapiclient.errors
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .locks import get_redis
+from .models import YouTubeChannel, LiveStream, StreamEvent
+from .tasks import start_recording
+from . import api_keys, metrics, quota, summary
+
+logger = logging.getLogger(__name__)
+
+
+def redis_available():
+    try:
+        get_redis().ping()
+        return True
+    except Exception:
+        return False
+
+
+class InlineApiClient:
+    """
+    YouTube API access for one in-process sweep.
+
+    googleapiclient services are not thread-safe, so every thread builds its
+    own. Keys are used in turn within their budget and dropped on quotaExceeded.
+    Spending is tracked locally and, when Redis is reachable, also charged to
+    the shared quota ledger so workers see it.
+    """
+
+    def __init__(self, use_ledger):
+        self.keys = api_keys.get_api_keys()
+        self.use_ledger = use_ledger
+        self.spent = quota.spent_by_key() if use_ledger else {key.id: 0 for key in self.keys}
+        self.exhausted = set()
+        self.units = Counter()
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def service(self, api_key):
+        services = self.local.__dict__.setdefault('services', {})
+        if api_key not in services:
+            client_options = None
+            if settings.YOUTUBE_API_ENDPOINT:
+                client_options = {'api_endpoint': settings.YOUTUBE_API_ENDPOINT}
+            services[api_key] = googleapiclient.discovery.build(
+                'youtube',
+                'v3',
+                developerKey=api_key,
+                client_options=client_options
+            )
+        return services[api_key]
+
+    def take_key(self, method):
+        units = quota.cost(method)
+        with self.lock:
+            available = [
+                key for key in self.keys
+                if key.id not in self.exhausted and quota.can_spend(units, self.spent.get(key.id, 0))
+            ]
+            if not available:
+                raise quota.QuotaExhausted(f"Not enough YouTube API quota left for {method}")
+            key = available[self.calls % len(available)]
+            self.calls += 1
+            self.spent[key.id] = self.spent.get(key.id, 0) + units
+            self.units[method] += units
+        return key
+
+    def execute(self, build_request, method):
+        while True:
+            key = self.take_key(method)
+            if self.use_ledger:
+                quota.charge(method, key.id)
+            metrics.API_QUOTA_UNITS.labels(method).inc(quota.cost(method))
+            try:
+                with metrics.observe_duration(metrics.API_REQUEST_LATENCY, method):
+                    return build_request(self.service(key.value)).execute()
+            except googleapiclient.errors.HttpError as e:
+                if not (e.resp.status == 403 and 'quotaExceeded' in str(e.content)):
+                    raise
+                with self.lock:
+                    self.exhausted.add(key.id)
+                if self.use_ledger:
+                    quota.mark_exhausted(key.id)
+
+
+def save_results(results):
+    """
+    Apply the live video lists of checked channels to the database in one transaction.
+
+    Returns the new and the ended streams.
+    """
+    now = timezone.now()
+    checked_ids = [channel.id for channel, _ in results]
+    live_videos = {
+        item['id']['videoId']: (channel, item['snippet'])
+        for channel, items in results
+        for item in items
+    }
+
+    with transaction.atomic():
+        known = set(LiveStream.objects.filter(
+            stream_id__in=live_videos
+        ).values_list('stream_id', flat=True))
+        new_streams = [
+            LiveStream(
+                channel=channel,
+                stream_id=video_id,
+                title=snippet['title'],
+                description=snippet.get('description', ''),
+                actual_start_time=now,
+                is_active=True
+            )
+            for video_id, (channel, snippet) in live_videos.items()
+            if video_id not in known
+        ]
+        LiveStream.objects.bulk_create(new_streams)
+
+        ended_streams = list(LiveStream.objects.filter(
+            channel_id__in=checked_ids,
+            is_active=True
+        ).exclude(stream_id__in=live_videos))
+        LiveStream.objects.filter(
+            id__in=[stream.id for stream in ended_streams]
+        ).update(is_active=False, actual_end_time=now, updated_at=now)
+
+        YouTubeChannel.objects.filter(id__in=checked_ids).update(last_checked_at=now)
+
+        events = []
+        # search.list does not tell when a stream went live, so there is no WENT_LIVE event
+        for stream in new_streams:
+            events.append(StreamEvent(live_stream=stream, event=StreamEvent.DETECTED, at=now))
+        for stream in ended_streams:
+            events.append(StreamEvent(live_stream=stream, event=StreamEvent.STREAM_ENDED, at=now))
+        StreamEvent.objects.bulk_create(events)
+
+    return new_streams, ended_streams
+
+
+def latency_summary(samples):
+    if not samples:
+        return {}
+    samples = sorted(samples)
+    return {
+        'p50_ms': round(statistics.median(samples) * 1000, 1),
+        'p95_ms': round(samples[int(0.95 * (len(samples) - 1))] * 1000, 1),
+        'max_ms': round(samples[-1] * 1000, 1),
+    }
+
+
+def run_sweep(workers, dispatch_recordings=True):
+    """
+    Check every monitored channel once, in this process, without Celery.
+
+    search.list calls run on a pool of `workers` threads; all database writes
+    happen afterwards in a single transaction. Returns timing and quota statistics.
+    """
+    started = time.perf_counter()
+    use_redis = redis_available()
+    if not use_redis:
+        logger.warning("Redis is not reachable: quota is only counted for this sweep and recordings are not started")
+
+    channels = list(YouTubeChannel.objects.filter(monitoring_task__is_active=True))
+    client = InlineApiClient(use_ledger=use_redis)
+
+    def check(channel):
+        call_started = time.perf_counter()
+        response = client.execute(lambda youtube: youtube.search().list(
+            channelId=channel.channel_id,
+            type='video',
+            eventType='live',
+            part='id,snippet',
+            maxResults=50
+        ), 'search.list')
+        return channel, response.get('items', []), time.perf_counter() - call_started
+
+    results = []
+    latencies = []
+    skipped = errors = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(check, channel): channel for channel in channels}
+        for future in as_completed(futures):
+            try:
+                channel, items, latency = future.result()
+            except quota.QuotaExhausted:
+                skipped += 1
+                continue
+            except Exception as e:
+                logger.error(f"Error checking channel {futures[future].handle}: {str(e)}")
+                errors += 1
+                continue
+            results.append((channel, items))
+            latencies.append(latency)
+            metrics.CHANNEL_POLL_LATENCY.observe(latency)
+    api_seconds = time.perf_counter() - started
+
+    db_started = time.perf_counter()
+    try:
+        new_streams, ended_streams = save_results(results)
+    except IntegrityError:
+        # A worker registered one of the streams meanwhile; retry against the current state
+        new_streams, ended_streams = save_results(results)
+    db_seconds = time.perf_counter() - db_started
+
+    if use_redis:
+        for channel_id in {stream.channel_id for stream in new_streams + ended_streams}:
+            summary.refresh(channel_id)
+        if dispatch_recordings:
+            for stream in new_streams:
+                start_recording.delay(stream.id)
+
+    return {
+        'channels': len(channels),
+        'checked': len(results),
+        'skipped_quota': skipped,
+        'errors': errors,
+        'new_streams': len(new_streams),
+        'ended_streams': len(ended_streams),
+        'recordings_started': len(new_streams) if use_redis and dispatch_recordings else 0,
+        'workers': workers,
+        'api_seconds': round(api_seconds, 3),
+        'db_seconds': round(db_seconds, 3),
+        'total_seconds': round(time.perf_counter() - started, 3),
+        'call_latency': latency_summary(latencies),
+        'quota_units': dict(client.units),
+        'quota_remaining': quota.remaining() if use_redis else None,
+    }
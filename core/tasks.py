@@ -1,24 +1,70 @@
 from celery import shared_task
 from celery.utils.log import get_task_logger
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
 import googleapiclient.discovery
 import googleapiclient.errors
 import subprocess
+import hashlib
 import os
 import time
-from .models import YouTubeChannel, MonitoringTask, LiveStream, Recording
+from .models import YouTubeChannel, MonitoringTask, LiveStream, Recording, RecordingPart, StreamEvent, WebSubSubscription
+from .locks import channel_lock, stream_lock, is_locked, get_redis, redis_lock
+from . import admission, api_keys, metrics, quota, recorders, history, live, thumbnails, tiering, timeline, waveform, websub
 
 logger = get_task_logger(__name__)
 
 
-def get_youtube_service():
-    """Initialize YouTube API service"""
-    return googleapiclient.discovery.build(
-        'youtube',
-        'v3',
-        developerKey=settings.YOUTUBE_API_KEY
-    )
+_youtube_services = {}
+
+
+def get_youtube_service(api_key):
+    """Initialize YouTube API service for a key of the pool"""
+    if api_key not in _youtube_services:
+        client_options = None
+        if settings.YOUTUBE_API_ENDPOINT:
+            client_options = {'api_endpoint': settings.YOUTUBE_API_ENDPOINT}
+        _youtube_services[api_key] = googleapiclient.discovery.build(
+            'youtube',
+            'v3',
+            developerKey=api_key,
+            client_options=client_options
+        )
+    return _youtube_services[api_key]
+
+
+def is_quota_exceeded_error(error):
+    """Check whether an HttpError is the API's daily quota error"""
+    return error.resp.status == 403 and 'quotaExceeded' in str(error.content)
+
+
+def execute_api_request(build_request, method, critical=False):
+    """
+    Execute a YouTube API request with a key from the pool, charging its cost to
+    that key's quota ledger
+
+    `build_request` receives a YouTube service and returns the request to run.
+    When a key answers quotaExceeded the request is retried with the next key.
+    Raises QuotaExhausted instead of calling the API when no key can afford it.
+    """
+    exhausted_keys = set()
+    while True:
+        key = api_keys.acquire(method, critical=critical, exclude=exhausted_keys)
+        quota.charge(method, key.id)
+        metrics.API_QUOTA_UNITS.labels(method).inc(quota.cost(method))
+        try:
+            with metrics.observe_duration(metrics.API_REQUEST_LATENCY, method):
+                return build_request(get_youtube_service(key.value)).execute()
+        except googleapiclient.errors.HttpError as e:
+            if not is_quota_exceeded_error(e):
+                raise
+            quota.mark_exhausted(key.id)
+            exhausted_keys.add(key.id)
 
 
 @shared_task
@@ -27,20 +73,18 @@ def check_channel_exists(handle):
     Check if a YouTube channel exists by handle using search and customUrl verification
     """
     try:
-        youtube = get_youtube_service()
-
         # Clean handle - remove @ if present
         clean_handle = handle.replace('@', '') if handle.startswith('@') else handle
 
         logger.info(f"Searching for channel with handle: @{clean_handle}")
 
         # Method 1: Search for channels and verify customUrl
-        search_response = youtube.search().list(
+        search_response = execute_api_request(lambda youtube: youtube.search().list(
             q=f'@{clean_handle}',
             type='channel',
             part='id,snippet',
             maxResults=20
-        ).execute()
+        ), 'search.list', critical=True)
 
         # Look for exact customUrl match
         for item in search_response.get('items', []):
@@ -48,10 +92,10 @@ def check_channel_exists(handle):
 
             try:
                 # Get detailed channel information
-                channel_response = youtube.channels().list(
+                channel_response = execute_api_request(lambda youtube: youtube.channels().list(
                     id=channel_id,
                     part='snippet,statistics'
-                ).execute()
+                ), 'channels.list', critical=True)
 
                 if not channel_response.get('items'):
                     continue
@@ -92,10 +136,10 @@ def check_channel_exists(handle):
             channel_id = first_item['id']['channelId']
 
             try:
-                channel_response = youtube.channels().list(
+                channel_response = execute_api_request(lambda youtube: youtube.channels().list(
                     id=channel_id,
                     part='snippet,statistics'
-                ).execute()
+                ), 'channels.list', critical=True)
 
                 if channel_response.get('items'):
                     channel_data = channel_response['items'][0]
@@ -128,6 +172,18 @@ def check_channel_exists(handle):
             'error': f'Канал с псевдонимом @{clean_handle} не найден. Проверьте правильность написания.'
         }
 
+    except api_keys.RateLimited:
+        logger.warning(f"YouTube API keys rate limited while checking handle {handle}")
+        return {
+            'exists': False,
+            'error': f'Слишком много запросов к YouTube API. Повторите через {api_keys.refill_seconds()} с.'
+        }
+    except quota.QuotaExhausted:
+        logger.warning(f"Quota exhausted while checking handle {handle}")
+        return {
+            'exists': False,
+            'error': 'Дневная квота YouTube API исчерпана. Попробуйте позже.'
+        }
     except googleapiclient.errors.HttpError as e:
         error_msg = f"YouTube API error: {e.resp.status} - {e._get_reason()}"
         logger.error(f"YouTube API error for handle {handle}: {error_msg}")
@@ -143,64 +199,91 @@ def check_channel_exists(handle):
         }
 
 
-@shared_task
-def update_channel_live_status(channel_id):
+def register_live_stream(channel, video_id, snippet, started_at=None):
     """
-    Update live stream status for a specific channel
+    Create the LiveStream record for a live video and start recording it if it is new
     """
-    try:
-        channel = YouTubeChannel.objects.get(id=channel_id)
-        youtube = get_youtube_service()
+    stream, created = LiveStream.objects.get_or_create(
+        stream_id=video_id,
+        defaults={
+            'channel': channel,
+            'title': snippet['title'],
+            'description': snippet.get('description', ''),
+            'actual_start_time': started_at or timezone.now(),
+            'is_active': True
+        }
+    )
 
-        # Search for live streams
-        search_response = youtube.search().list(
-            channelId=channel.channel_id,
-            type='video',
-            eventType='live',
-            part='id,snippet',
-            maxResults=50
-        ).execute()
+    if created:
+        logger.info(f"New live stream detected: {stream.title}")
+        # Polling only sees that a stream is live, not since when; a made-up start
+        # time would report a poll delay of zero, so the event is left out then
+        if started_at:
+            timeline.record(stream.id, StreamEvent.WENT_LIVE, at=started_at)
+        timeline.record(stream.id, StreamEvent.DETECTED)
+        # Check if we should record this stream
+        if hasattr(channel, 'monitoring_task') and channel.monitoring_task.is_active:
+            start_recording.delay(stream.id)
 
-        current_stream_ids = set()
+    return stream, created
 
-        for item in search_response.get('items', []):
-            video_id = item['id']['videoId']
-            current_stream_ids.add(video_id)
-
-            # Create or update live stream record
-            stream, created = LiveStream.objects.get_or_create(
-                stream_id=video_id,
-                defaults={
-                    'channel': channel,
-                    'title': item['snippet']['title'],
-                    'description': item['snippet'].get('description', ''),
-                    'actual_start_time': timezone.now(),
-                    'is_active': True
-                }
-            )
 
-            if created:
-                logger.info(f"New live stream detected: {stream.title}")
-                # Check if we should record this stream
-                if hasattr(channel, 'monitoring_task') and channel.monitoring_task.is_active:
-                    start_recording.delay(stream.id)
+def mark_stream_ended(stream, ended_at=None):
+    stream.is_active = False
+    stream.actual_end_time = ended_at or timezone.now()
+    stream.save()
+    timeline.record(stream.id, StreamEvent.STREAM_ENDED, at=stream.actual_end_time)
+    logger.info(f"Live stream ended: {stream.title}")
 
-        # Mark ended streams
-        ended_streams = LiveStream.objects.filter(
-            channel=channel,
-            is_active=True
-        ).exclude(stream_id__in=current_stream_ids)
 
-        for stream in ended_streams:
-            stream.is_active = False
-            stream.actual_end_time = timezone.now()
-            stream.save()
-            logger.info(f"Live stream ended: {stream.title}")
+@shared_task
+def update_channel_live_status(channel_id):
+    """
+    Update live stream status for a specific channel
+    """
+    with channel_lock(channel_id) as acquired:
+        if not acquired:
+            logger.info(f"Previous check of channel {channel_id} is still running, skipping")
+            return
 
-    except YouTubeChannel.DoesNotExist:
-        logger.error(f"Channel with id {channel_id} not found")
-    except Exception as e:
-        logger.error(f"Error updating live status for channel {channel_id}: {str(e)}")
+        poll_started = time.monotonic()
+        try:
+            channel = YouTubeChannel.objects.get(id=channel_id)
+            # Search for live streams
+            search_response = execute_api_request(lambda youtube: youtube.search().list(
+                channelId=channel.channel_id,
+                type='video',
+                eventType='live',
+                part='id,snippet',
+                maxResults=50
+            ), 'search.list')
+
+            current_stream_ids = set()
+
+            for item in search_response.get('items', []):
+                video_id = item['id']['videoId']
+                current_stream_ids.add(video_id)
+                register_live_stream(channel, video_id, item['snippet'])
+
+            # Mark ended streams
+            ended_streams = LiveStream.objects.filter(
+                channel=channel,
+                is_active=True
+            ).exclude(stream_id__in=current_stream_ids)
+
+            for stream in ended_streams:
+                mark_stream_ended(stream)
+
+            YouTubeChannel.objects.filter(id=channel.id).update(last_checked_at=timezone.now())
+
+        except quota.QuotaExhausted:
+            logger.warning(f"Skipping check of channel {channel_id}: polling quota exhausted")
+        except YouTubeChannel.DoesNotExist:
+            logger.error(f"Channel with id {channel_id} not found")
+        except Exception as e:
+            logger.error(f"Error updating live status for channel {channel_id}: {str(e)}")
+        finally:
+            metrics.CHANNEL_POLL_LATENCY.observe(time.monotonic() - poll_started)
 
 
 @shared_task
@@ -224,6 +307,9 @@ def start_monitoring_channel(channel_id):
         # Do initial status check
         update_channel_live_status.delay(channel_id)
 
+        if settings.WEBSUB_ENABLED:
+            subscribe_websub.delay(channel_id)
+
         logger.info(f"Started monitoring channel: {channel.handle} ({channel.title})")
 
     except YouTubeChannel.DoesNotExist:
@@ -236,55 +322,326 @@ def stop_monitoring_channel(channel_id):
     Stop monitoring a channel for live streams
     """
     try:
-        # Use filter().update() to avoid DoesNotExist exception
-        MonitoringTask.objects.filter(channel_id=channel_id).update(is_active=False)
+        # Save through the model (not update()) so the cached channel summary is refreshed
+        for task in MonitoringTask.objects.filter(channel_id=channel_id, is_active=True):
+            task.is_active = False
+            task.save(update_fields=['is_active', 'updated_at'])
         logger.info(f"Stopped monitoring for channel ID: {channel_id}")
 
+        if settings.WEBSUB_ENABLED and WebSubSubscription.objects.filter(channel_id=channel_id, is_active=True).exists():
+            subscribe_websub.delay(channel_id, mode='unsubscribe')
+
     except Exception as e:
         logger.error(f"Error stopping monitoring for channel {channel_id}: {str(e)}")
 
 
+@shared_task
+def check_video_status(video_id, attempt=0):
+    """
+    Targeted live status check of a single video, triggered by a WebSub notification
+
+    Costs one quota unit instead of a 100-unit search. Upcoming streams are
+    re-checked around their scheduled start.
+    """
+    try:
+        response = execute_api_request(lambda youtube: youtube.videos().list(
+            id=video_id,
+            part='snippet,liveStreamingDetails'
+        ), 'videos.list', critical=True)
+
+        items = response.get('items', [])
+        if not items:
+            return
+
+        snippet = items[0]['snippet']
+        details = items[0].get('liveStreamingDetails', {})
+        channel = YouTubeChannel.objects.filter(channel_id=snippet['channelId']).first()
+        if channel is None:
+            logger.warning(f"Notification for video {video_id} of unknown channel {snippet['channelId']}")
+            return
+
+        state = snippet.get('liveBroadcastContent')
+        if state == 'live':
+            started_at = parse_datetime(details['actualStartTime']) if details.get('actualStartTime') else None
+            register_live_stream(channel, video_id, snippet, started_at=started_at)
+        elif state == 'upcoming' and attempt < settings.WEBSUB_UPCOMING_RECHECKS:
+            scheduled = details.get('scheduledStartTime')
+            recheck_at = timezone.now() + timedelta(seconds=settings.WEBSUB_UPCOMING_RECHECK_INTERVAL)
+            if scheduled:
+                recheck_at = max(recheck_at, parse_datetime(scheduled))
+            check_video_status.apply_async((video_id, attempt + 1), eta=recheck_at)
+        else:
+            stream = LiveStream.objects.filter(stream_id=video_id, is_active=True).first()
+            if stream:
+                ended_at = parse_datetime(details['actualEndTime']) if details.get('actualEndTime') else None
+                mark_stream_ended(stream, ended_at)
+
+    except api_keys.RateLimited:
+        # A notification is not repeated, so the check is retried once the buckets refill
+        delay = api_keys.refill_seconds()
+        logger.warning(f"YouTube API keys rate limited, check of video {video_id} retried in {delay}s")
+        check_video_status.apply_async((video_id, attempt), countdown=delay)
+    except quota.QuotaExhausted:
+        logger.warning(f"Skipping check of video {video_id}: quota exhausted")
+    except Exception as e:
+        logger.error(f"Error checking video {video_id}: {str(e)}")
+
+
+@shared_task
+def check_active_streams():
+    """
+    Detect ended live streams with videos.list, 50 streams per quota unit
+    """
+    streams = list(LiveStream.objects.filter(is_active=True))
+    for start in range(0, len(streams), 50):
+        batch = {stream.stream_id: stream for stream in streams[start:start + 50]}
+        try:
+            response = execute_api_request(lambda youtube: youtube.videos().list(
+                id=','.join(batch),
+                part='snippet,liveStreamingDetails',
+                maxResults=50
+            ), 'videos.list', critical=True)
+        except api_keys.RateLimited:
+            # Out of request tokens, not of quota: check the rest once the buckets refill
+            delay = api_keys.refill_seconds()
+            logger.warning(f"YouTube API keys rate limited, active streams check resumes in {delay}s")
+            check_active_streams.apply_async(countdown=delay)
+            return
+        except quota.QuotaExhausted:
+            logger.warning("Quota exhausted, active streams check stopped")
+            return
+        except Exception as e:
+            logger.error(f"Error checking {len(batch)} active streams: {str(e)}")
+            continue
+
+        returned = set()
+        for item in response.get('items', []):
+            returned.add(item['id'])
+            if item['snippet'].get('liveBroadcastContent') != 'live':
+                details = item.get('liveStreamingDetails', {})
+                ended_at = parse_datetime(details['actualEndTime']) if details.get('actualEndTime') else None
+                mark_stream_ended(batch[item['id']], ended_at)
+
+        # Videos missing from the response were deleted or made private
+        for video_id in set(batch) - returned:
+            mark_stream_ended(batch[video_id])
+
+
+@shared_task
+def subscribe_websub(channel_id, mode='subscribe'):
+    """
+    Subscribe to (or unsubscribe from) push notifications of a channel feed
+    """
+    try:
+        channel = YouTubeChannel.objects.get(id=channel_id)
+        subscription, created = WebSubSubscription.objects.get_or_create(
+            channel=channel,
+            defaults={'secret': websub.new_secret()}
+        )
+        subscription.is_active = mode == 'subscribe'
+        subscription.requested_at = timezone.now()
+        subscription.save()
+
+        websub.request_subscription(subscription, mode)
+        logger.info(f"Requested WebSub {mode} for channel {channel.handle}")
+
+    except YouTubeChannel.DoesNotExist:
+        logger.error(f"Channel with id {channel_id} not found")
+    except Exception as e:
+        logger.error(f"Error requesting WebSub {mode} for channel {channel_id}: {str(e)}")
+
+
+@shared_task
+def renew_websub_subscriptions():
+    """
+    Keep WebSub leases of monitored channels alive and drop the others
+    """
+    if not settings.WEBSUB_ENABLED:
+        return
+
+    renew_before = timezone.now() + timedelta(seconds=settings.WEBSUB_RENEW_BEFORE)
+    to_subscribe = YouTubeChannel.objects.filter(monitoring_task__is_active=True).exclude(
+        websub_subscription__is_active=True,
+        websub_subscription__lease_expires_at__gt=renew_before
+    )
+    for channel in to_subscribe:
+        subscribe_websub.delay(channel.id)
+
+    to_unsubscribe = WebSubSubscription.objects.filter(is_active=True).exclude(
+        channel__monitoring_task__is_active=True
+    )
+    for subscription in to_unsubscribe:
+        subscribe_websub.delay(subscription.channel_id, mode='unsubscribe')
+
+
 @shared_task
 def start_recording(stream_id):
     """
     Start recording a live stream
     """
-    try:
-        stream = LiveStream.objects.get(id=stream_id, is_active=True)
+    with stream_lock(stream_id) as acquired:
+        if not acquired:
+            logger.info(f"Recording start for stream {stream_id} is already in progress")
+            return
 
-        # Check if already recording
-        if hasattr(stream, 'recording') and stream.recording.is_completed is False:
-            logger.info(f"Already recording stream: {stream.title}")
+        try:
+            stream = LiveStream.objects.get(id=stream_id, is_active=True)
+
+            # The one-to-one constraint guarantees a single recording per stream
+            with transaction.atomic():
+                recording, created = Recording.objects.get_or_create(live_stream=stream)
+                if not created:
+                    logger.info(f"Already recording stream: {stream.title}")
+                    return
+
+                stream.is_recording = True
+                stream.save(update_fields=['is_recording', 'updated_at'])
+
+            # Wait for a free slot in priority order, then start on the least-loaded node
+            admission.enqueue(recording.id, recording_priority(stream.channel))
+            timeline.record(stream.id, StreamEvent.RECORDING_QUEUED)
+            admit_recordings()
+
+            logger.info(f"Queued recording of stream: {stream.title}")
+
+        except LiveStream.DoesNotExist:
+            logger.error(f"Stream with id {stream_id} not found")
+
+
+def recording_priority(channel):
+    if hasattr(channel, 'monitoring_task'):
+        return channel.monitoring_task.priority
+    return MonitoringTask.PRIORITY_NORMAL
+
+
+@shared_task
+def admit_recordings():
+    """
+    Start queued recordings in priority order while there are free slots
+
+    A slot is free when the global MAX_CONCURRENT_RECORDINGS cap (minus the
+    high priority reserve for other channels) is not reached and some recorder
+    node has room.
+    """
+    with redis_lock('admission', 60) as acquired:
+        if not acquired:
             return
 
-        # Create recording record
-        recording = Recording.objects.create(live_stream=stream)
-        stream.is_recording = True
-        stream.save()
+        # Free slots of recordings that were deleted or finished without releasing them,
+        # or whose node died after their stream ended
+        admitted = set(admission.admitted_ids())
+        if admitted:
+            in_progress = set(Recording.objects.filter(
+                id__in=admitted,
+                is_completed=False
+            ).exclude(
+                Q(live_stream__is_active=False) & ~Q(node='') & ~Q(node__in=list(recorders.live_nodes()))
+            ).values_list('id', flat=True))
+            for recording_id in admitted - in_progress:
+                admission.release(recording_id)
+
+        for recording_id in admission.pending():
+            recording = Recording.objects.select_related(
+                'live_stream__channel__monitoring_task'
+            ).filter(id=recording_id).first()
+            if recording is None or recording.is_completed:
+                admission.remove(recording_id)
+                continue
+
+            stream = recording.live_stream
+            if not stream.is_active:
+                # The stream ended while waiting for a slot
+                admission.remove(recording_id)
+                recording.delete()
+                stream.is_recording = False
+                stream.save(update_fields=['is_recording', 'updated_at'])
+                logger.info(f"Stream ended before a recording slot was free: {stream.title}")
+                continue
+
+            priority = recording_priority(stream.channel)
+            active = admission.admitted_count()
+            if active >= admission.capacity_for(priority):
+                # The queue is ordered by priority, nothing behind this one fits either
+                break
+            if recorders.live_nodes() and recorders.choose_node() is None:
+                logger.info("All recorder nodes are full, recordings stay queued")
+                break
 
-        # Start recording process
-        record_stream.delay(recording.id)
+            recording.max_quality = admission.choose_quality(priority, active)
+            recording.save(update_fields=['max_quality'])
+            admission.admit(recording.id)
+            dispatch_recording(recording)
 
-        logger.info(f"Started recording stream: {stream.title}")
 
-    except LiveStream.DoesNotExist:
-        logger.error(f"Stream with id {stream_id} not found")
+def dispatch_recording(recording, exclude=(), countdown=None):
+    """
+    Send a recording job to the queue of the least-loaded live recorder node
+
+    Falls back to the shared queue when no node has advertised free capacity.
+    """
+    node = recorders.choose_node(exclude=exclude)
+    Recording.objects.filter(id=recording.id).update(node=node or '')
+    timeline.record(recording.live_stream_id, StreamEvent.RECORDING_ADMITTED)
+    if node:
+        recorders.recording_started(recording.id, node)
+        record_stream.apply_async((recording.id,), queue=recorders.queue_name(node), countdown=countdown)
+        logger.info(f"Recording {recording.id} placed on node {node}")
+    else:
+        logger.warning(f"No recorder node with free capacity, recording {recording.id} sent to the shared queue")
+        record_stream.apply_async((recording.id,), countdown=countdown)
 
 
 @shared_task
-def record_stream(recording_id):
+def record_stream(recording_id, handoff_from=None):
     """
     Record stream using ytarchive and convert to MP3
+
+    Every attempt keeps what it captured as a RecordingPart. A failed attempt
+    is retried with exponential backoff while the stream is live; once it is
+    over the parts are joined without re-encoding and converted.
+
+    With `handoff_from` this is a replacement capture for a draining node: it
+    runs next to the old one and takes the recording over as soon as it
+    receives audio, after which the old capture stops.
     """
     try:
+        node = recorders.current_node()
+        if handoff_from is None and recorders.is_draining(node) and recorders.choose_node(exclude={node}):
+            # Jobs that still reach a draining node go to another one
+            recording = Recording.objects.filter(
+                id=recording_id,
+                is_completed=False,
+                node__in=['', node]
+            ).first()
+            recorders.recording_finished(recording_id)
+            if recording is not None:
+                logger.info(f"Node {node} is draining, moving recording {recording_id}")
+                dispatch_recording(recording, exclude={node})
+            return
+
+        # Claim the job; a stale message for a recording that was moved to another node is dropped.
+        # A replacement capture leaves the recording on the old node until it takes it over, and
+        # is not an attempt: handoffs must not eat into the retry budget
+        claim = Recording.objects.filter(id=recording_id, is_completed=False)
+        if handoff_from:
+            claimed = claim.filter(node=handoff_from).exists()
+        else:
+            claimed = claim.filter(node__in=['', node]).update(node=node, attempts=F('attempts') + 1)
+        if not claimed:
+            recorders.recording_finished(recording_id)
+            logger.info(f"Recording {recording_id} is completed or assigned to another node, skipping")
+            return
+
         recording = Recording.objects.get(id=recording_id)
         stream = recording.live_stream
-        channel = stream.channel
+        timeline.record(stream.id, StreamEvent.RECORDER_STARTED)
 
         # Create filename
-        safe_title = "".join(c for c in stream.title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
-        base_filename = f"{channel.handle}_{safe_title}_{timestamp}"
+        base_filename = recording_basename(stream)
+        if handoff_from:
+            base_filename += f"_handoff{recording.parts.count() + 1}"
+        elif recording.attempts > 1:
+            base_filename += f"_part{recording.attempts}"
         video_filename = f"{base_filename}.mp4"
         audio_filename = f"{base_filename}.mp3"
 
@@ -297,70 +654,356 @@ def record_stream(recording_id):
 
         # Record using ytarchive
         stream_url = f"https://www.youtube.com/watch?v={stream.stream_id}"
-
+        # Admission sets a ceiling; step down further if this node's link is saturated
+        quality = recorders.select_quality(node, ceiling=recording.max_quality or None, recording_id=recording.id)
+        if quality != recording.quality:
+            recording.quality = quality
+            recording.save(update_fields=['quality'])
+
+        recorders.recording_started(recording.id)
+        retrying = False
+        owner = handoff_from is None
         try:
             # Record with ytarchive
             ytarchive_cmd = [
-                'ytarchive',
+                settings.YTARCHIVE_BIN,
                 '--merge',
                 '-o', str(video_path.with_suffix('')),  # Output without extension
                 stream_url,
-                'best'
+                quality
             ]
 
             logger.info(f"Starting ytarchive recording: {' '.join(ytarchive_cmd)}")
-            process = subprocess.Popen(
-                ytarchive_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+            metrics.DETECTION_TO_RECORDING.observe(
+                (timezone.now() - stream.created_at).total_seconds()
             )
+            with metrics.ACTIVE_RECORDINGS.track_inprogress():
+                capture_started = timezone.now()
+                process = subprocess.Popen(
+                    ytarchive_cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True
+                )
+                timeline.record(stream.id, StreamEvent.CAPTURE_STARTED)
+
+                # Optionally republish the audio as rolling HLS while recording
+                preview = None
+                if settings.LIVE_HLS_ENABLED and not handoff_from:
+                    preview = live.LivePreview(recording.id, video_path.with_suffix(''))
+                    preview.start()
+
+                # Take the recording over, or hand it off, when a node drains
+                fragments_path = video_path.parent / f'{video_path.stem}{live.AUDIO_FRAGMENTS_SUFFIX}'
+                handoff = recorders.HandoffWatch(recording.id, node, process, fragments_path, handoff_from)
+                handoff.start()
+
+                # Wait for process to complete (stream to end)
+                try:
+                    stdout, stderr = process.communicate()
+                finally:
+                    handoff.stop()
+                    if preview:
+                        preview.stop()
+
+            timeline.record(stream.id, StreamEvent.CAPTURE_FINISHED)
+            if handoff.capturing_since:
+                capture_started = datetime.fromtimestamp(handoff.capturing_since, tz=dt_timezone.utc)
+            capture_finished = timezone.now()
+            if handoff.handed_off_at:
+                capture_finished = datetime.fromtimestamp(handoff.handed_off_at, tz=dt_timezone.utc)
+
+            owner = Recording.objects.filter(id=recording.id, node=node).exists()
+            if handoff_from and not owner:
+                # The old capture ended or moved first, this one is not needed
+                discard_capture(video_path)
+                logger.info(f"Replacement capture of {stream.title} was not needed, discarded")
+                return
+            if handoff_from:
+                # Let the replaced capture save its part before the parts are joined
+                recording.node = node
+                wait_for_handoff(recording.id)
+
+            # Keep whatever was captured, even by a failed attempt
+            save_part(recording, video_path, process.returncode == 0, capture_started, capture_finished)
+
+            if not owner:
+                recorders.end_handoff(recording.id)
+                logger.info(f"Recording of {stream.title} was handed off to another node")
+            elif process.returncode == 0:
+                logger.info(f"Successfully recorded stream: {stream.title}")
+                finish_recording(recording, audio_path)
+            else:
+                logger.error(f"ytarchive failed for stream {stream.title}: {stderr}")
+                retrying = retry_recording(recording, audio_path)
 
-            # Wait for process to complete (stream to end)
-            stdout, stderr = process.communicate()
+        except Exception as e:
+            logger.error(f"Error during recording process for {stream.title}: {str(e)}")
+            owner = Recording.objects.filter(id=recording.id, node=node).exists()
+            if owner:
+                retrying = retry_recording(recording, audio_path)
+        finally:
+            # A retry already moved the slot to the node it was dispatched to;
+            # recording.id is None if the recording was deleted
+            if not retrying:
+                recorders.recording_finished(recording_id)
+            # The slot belongs to whichever node ends up finishing the recording
+            if owner and not retrying:
+                admission.release(recording_id)
+                admit_recordings.delay()
 
-            if process.returncode == 0:
-                logger.info(f"Successfully recorded stream: {stream.title}")
+    except Recording.DoesNotExist:
+        logger.error(f"Recording with id {recording_id} not found")
+    except Exception as e:
+        logger.error(f"Error in record_stream task: {str(e)}")
 
-                # Convert to MP3
-                convert_to_mp3(str(video_path), str(audio_path))
 
-                # Update recording record
-                recording.original_video_path = f'recordings/videos/{video_filename}'
-                recording.audio_path = f'recordings/audio/{audio_filename}'
-                recording.recording_finished = timezone.now()
-                recording.is_completed = True
+def recording_basename(stream):
+    """File name, without extension, for a new capture or recording of a stream"""
+    safe_title = "".join(c for c in stream.title if c.isalnum() or c in (' ', '-', '_')).rstrip()
+    timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
+    return f"{stream.channel.handle}_{safe_title}_{timestamp}"
+
+
+def save_part(recording, video_path, is_complete, capture_started, capture_finished):
+    """Store the capture of one attempt as a part of the recording"""
+    capture_path = find_capture(video_path)
+    if not capture_path.exists():
+        return
+    metrics.CAPTURED_BYTES.inc(capture_path.stat().st_size)
+    RecordingPart.objects.create(
+        recording=recording,
+        index=recording.parts.count(),
+        video_path=f'recordings/videos/{capture_path.name}',
+        file_size=capture_path.stat().st_size,
+        is_complete=is_complete,
+        capture_started=capture_started,
+        capture_finished=capture_finished
+    )
 
-                # Calculate file size
-                if audio_path.exists():
-                    recording.file_size = audio_path.stat().st_size
 
-                recording.save()
+def discard_capture(video_path):
+    capture_path = find_capture(video_path)
+    if capture_path.exists():
+        os.remove(capture_path)
 
-                # Update monitoring task count
-                if hasattr(channel, 'monitoring_task'):
-                    task = channel.monitoring_task
-                    task.recordings_count += 1
-                    task.save()
 
-                # Update stream
-                stream.is_recording = False
-                stream.save()
+def wait_for_handoff(recording_id):
+    """Wait, within the handoff timeout, until the replaced node has saved its part"""
+    deadline = time.monotonic() + settings.RECORDER_HANDOFF_TIMEOUT
+    while recorders.handoff_pending(recording_id) and time.monotonic() < deadline:
+        time.sleep(1)
 
-                logger.info(f"Successfully processed recording: {stream.title}")
 
-            else:
-                logger.error(f"ytarchive failed for stream {stream.title}: {stderr}")
-                recording.delete()
+def hand_off_recordings(node):
+    """
+    Start replacement captures on other nodes for the live recordings of `node`
 
-        except Exception as e:
-            logger.error(f"Error during recording process for {stream.title}: {str(e)}")
-            recording.delete()
+    The node should be draining so that it gets no new recordings. Returns the
+    number of recordings handed off; without a free node the rest keep
+    recording where they are.
+    """
+    handed_off = 0
+    recordings = Recording.objects.filter(
+        id__in=recorders.active_recordings(node),
+        node=node,
+        is_completed=False,
+        live_stream__is_active=True
+    )
+    for recording in recordings:
+        if recorders.handoff_pending(recording.id):
+            continue
+        target = recorders.choose_node(exclude={node})
+        if target is None:
+            logger.warning(f"No recorder node can take over recordings of {node}")
+            break
+        recorders.begin_handoff(recording.id, node, target)
+        recorders.recording_started(recording.id, target)
+        record_stream.apply_async((recording.id,), {'handoff_from': node}, queue=recorders.queue_name(target))
+        logger.info(f"Handing recording {recording.id} off from {node} to {target}")
+        handed_off += 1
+    return handed_off
+
+
+def retry_recording(recording, audio_path):
+    """
+    Handle a failed recording attempt.
 
-    except Recording.DoesNotExist:
-        logger.error(f"Recording with id {recording_id} not found")
+    Schedules another attempt with exponential backoff while the stream is
+    still live and attempts remain, and returns True. Otherwise finishes the
+    recording from the parts captured so far, or deletes it if there are none.
+    """
+    stream = recording.live_stream
+    stream.refresh_from_db(fields=['is_active'])
+    if stream.is_active and recording.attempts < settings.RECORDING_MAX_ATTEMPTS:
+        delay = min(
+            settings.RECORDING_RETRY_BASE_DELAY * 2 ** (recording.attempts - 1),
+            settings.RECORDING_RETRY_MAX_DELAY
+        )
+        logger.warning(
+            f"Retrying recording of {stream.title} in {delay}s "
+            f"(attempt {recording.attempts + 1} of {settings.RECORDING_MAX_ATTEMPTS})"
+        )
+        timeline.record(stream.id, StreamEvent.RECORDING_RETRIED)
+        # Free this node's slot first; dispatch takes one on whichever node gets the retry
+        recorders.recording_finished(recording.id)
+        dispatch_recording(recording, countdown=delay)
+        return True
+
+    if not recording.parts.exists():
+        logger.error(f"Nothing was captured for stream {stream.title}, dropping the recording")
+        recording.delete()
+        stream.is_recording = False
+        stream.save(update_fields=['is_recording', 'updated_at'])
+        return False
+
+    try:
+        finish_recording(recording, audio_path)
     except Exception as e:
-        logger.error(f"Error in record_stream task: {str(e)}")
+        # Leave the parts in place so they can still be joined by hand
+        logger.error(f"Error finishing partial recording of {stream.title}: {str(e)}")
+        stream.is_recording = False
+        stream.save(update_fields=['is_recording', 'updated_at'])
+    return False
+
+
+def finish_recording(recording, audio_path):
+    """Join the captured parts, convert them to MP3 and mark the recording completed"""
+    stream = recording.live_stream
+    channel = stream.channel
+    parts = list(recording.parts.all())
+
+    if len(parts) == 1:
+        capture_path = Path(parts[0].video_path.path)
+    else:
+        capture_path = audio_path.parent.parent / 'videos' / f'{audio_path.stem}.m4a'
+        join_parts([part.video_path.path for part in parts], capture_path, overlaps(parts))
+        logger.info(f"Joined {len(parts)} parts of {stream.title}")
+
+    # Convert to MP3
+    convert_to_mp3(str(capture_path), str(audio_path))
+    waveform_filename = build_waveform(audio_path)
+    timeline.record(stream.id, StreamEvent.CONVERSION_FINISHED)
+
+    # The parts are in the MP3 now
+    for part in parts:
+        if os.path.isfile(part.video_path.path):
+            os.remove(part.video_path.path)
+    recording.parts.all().delete()
+
+    # Update recording record
+    recording.original_video_path = f'recordings/videos/{capture_path.name}'
+    recording.audio_path = f'recordings/audio/{audio_path.name}'
+    if waveform_filename:
+        recording.waveform_path = f'{waveform.WAVEFORMS_SUBDIR}/{waveform_filename}'
+    recording.recording_finished = timezone.now()
+    recording.is_completed = True
+
+    # Calculate file size
+    if audio_path.exists():
+        recording.file_size = audio_path.stat().st_size
+
+    recording.save()
+
+    # Update monitoring task count
+    if hasattr(channel, 'monitoring_task'):
+        task = channel.monitoring_task
+        task.recordings_count += 1
+        task.save()
+
+    # Update stream
+    stream.is_recording = False
+    stream.save(update_fields=['is_recording', 'updated_at'])
+    timeline.record(stream.id, StreamEvent.RECORDING_SAVED)
+
+    logger.info(f"Successfully processed recording: {stream.title}")
+
+
+def overlaps(parts):
+    """
+    Seconds at the start of each part that the previous part already has
+
+    Captures of a handoff run side by side for a while; retried captures do not overlap.
+    """
+    skips = [0.0]
+    for previous, part in zip(parts, parts[1:]):
+        skip = 0.0
+        if previous.capture_finished and part.capture_started:
+            skip = max(0.0, (previous.capture_finished - part.capture_started).total_seconds())
+        skips.append(skip)
+    return skips
+
+
+def join_parts(input_paths, output_path, inpoints=None):
+    """
+    Concatenate the audio of several captures with ffmpeg's concat demuxer, without re-encoding
+
+    The concat demuxer maps streams by index using the layout of the first
+    input, while parts may be audio-only fragments, .m4a or .mp4 with video
+    first, so each part is remuxed to an audio-only .m4a beforehand.
+    `inpoints` are seconds to skip at the start of each input.
+    """
+    list_path = settings.TEMP_DIR / f'{output_path.stem}.concat.txt'
+    audio_paths = []
+    try:
+        for index, path in enumerate(input_paths):
+            audio_path = settings.TEMP_DIR / f'{output_path.stem}.part{index}.m4a'
+            result = subprocess.run([
+                settings.FFMPEG_BIN,
+                '-i', str(path),
+                '-map', '0:a:0',
+                '-c', 'copy',
+                str(audio_path),
+                '-y'
+            ], capture_output=True, text=True)
+            if result.returncode != 0:
+                raise Exception(f"FFmpeg audio extraction failed for {path}: {result.stderr}")
+            audio_paths.append(audio_path)
+
+        with open(list_path, 'w') as f:
+            for path, inpoint in zip(audio_paths, inpoints or [0] * len(audio_paths)):
+                escaped = str(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+                if inpoint:
+                    f.write(f"inpoint {inpoint:.3f}\n")
+
+        ffmpeg_cmd = [
+            settings.FFMPEG_BIN,
+            '-f', 'concat',
+            '-safe', '0',
+            '-i', str(list_path),
+            '-map', '0:a',
+            '-c', 'copy',
+            str(output_path),
+            '-y'
+        ]
+        result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise Exception(f"FFmpeg concat failed: {result.stderr}")
+    finally:
+        for path in [list_path, *audio_paths]:
+            if path.exists():
+                os.remove(path)
+
+
+CAPTURE_EXTENSIONS = ('.mp4', '.m4a', '.mkv', '.webm')
+
+
+def find_capture(video_path):
+    """
+    Return the file ytarchive actually wrote for an output path
+
+    When an attempt fails before muxing, the raw audio fragments it downloaded
+    are used instead.
+    """
+    for extension in CAPTURE_EXTENSIONS:
+        candidate = video_path.with_suffix(extension)
+        if candidate.exists():
+            return candidate
+    fragments = video_path.parent / f'{video_path.stem}{live.AUDIO_FRAGMENTS_SUFFIX}'
+    if fragments.exists():
+        return fragments
+    return video_path
 
 
 def convert_to_mp3(input_path, output_path):
@@ -369,7 +1012,7 @@ def convert_to_mp3(input_path, output_path):
     """
     try:
         ffmpeg_cmd = [
-            'ffmpeg',
+            settings.FFMPEG_BIN,
             '-i', input_path,
             '-q:a', '0',
             '-map', 'a',
@@ -377,7 +1020,8 @@ def convert_to_mp3(input_path, output_path):
             '-y'  # Overwrite output file
         ]
 
-        result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
+        with metrics.observe_duration(metrics.FFMPEG_DURATION):
+            result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
 
         if result.returncode != 0:
             logger.error(f"FFmpeg conversion failed: {result.stderr}")
@@ -394,6 +1038,19 @@ def convert_to_mp3(input_path, output_path):
         raise
 
 
+def build_waveform(audio_path):
+    """
+    Write the waveform/seek index sidecar of an MP3, returning its file name.
+
+    A failure here must not lose the recording, so errors are only logged.
+    """
+    try:
+        return waveform.write_sidecar(audio_path, waveform.sidecar_path_for(audio_path)).name
+    except Exception as e:
+        logger.error(f"Error building waveform for {audio_path}: {str(e)}")
+        return None
+
+
 @shared_task
 def periodic_channel_check():
     """
@@ -403,11 +1060,239 @@ def periodic_channel_check():
         monitored_channels = YouTubeChannel.objects.filter(
             monitoring_task__is_active=True
         )
+        channel_count = monitored_channels.count()
+        metrics.QUOTA_REMAINING.set(quota.remaining())
 
-        for channel in monitored_channels:
+        # Push notifications detect new streams; ended ones are found by a cheap batched check
+        if settings.WEBSUB_ENABLED:
+            check_active_streams.delay()
+
+        # Pace polling so the remaining budget lasts until the quota resets
+        interval = quota.poll_interval(channel_count)
+        if interval is None:
+            logger.warning("Polling quota exhausted, waiting for the daily reset")
+            return
+        if settings.WEBSUB_ENABLED:
+            interval = max(interval, settings.WEBSUB_SAFETY_SWEEP_INTERVAL)
+
+        due_before = timezone.now() - timedelta(seconds=interval)
+        due_channels = monitored_channels.filter(
+            Q(last_checked_at__isnull=True) | Q(last_checked_at__lte=due_before)
+        ).order_by(F('last_checked_at').asc(nulls_first=True))
+
+        dispatched = 0
+        for channel in due_channels:
+            # Skip channels whose previous check has not finished yet
+            if is_locked(f'channel:{channel.id}'):
+                logger.info(f"Channel {channel.handle} is still being checked, skipping")
+                continue
             update_channel_live_status.delay(channel.id)
+            dispatched += 1
 
-        logger.info(f"Periodic check completed for {monitored_channels.count()} channels")
+        logger.info(
+            f"Periodic check dispatched {dispatched} of {channel_count} channels "
+            f"(poll interval {interval:.0f}s, {quota.remaining()} quota units left)"
+        )
 
     except Exception as e:
-        logger.error(f"Error in periodic channel check: {str(e)}")
\ No newline at end of file
+        logger.error(f"Error in periodic channel check: {str(e)}")
+
+
+@shared_task
+def refresh_channel_statistics():
+    """
+    Refresh subscriber, view and video counts of all channels
+
+    Channels are fetched 50 per channels.list call. Each batch remembers the
+    ETag of its last response and sends it as If-None-Match, so batches whose
+    statistics did not change come back as 304 and touch no rows.
+    """
+    channels = list(YouTubeChannel.objects.only(
+        'id', 'channel_id', 'subscriber_count', 'view_count', 'video_count', 'thumbnail_url'
+    ).order_by('id'))
+    redis_client = get_redis()
+    changed = []
+    sampled = []
+    thumbnails_changed = []
+    not_modified = 0
+
+    for start in range(0, len(channels), 50):
+        batch = {channel.channel_id: channel for channel in channels[start:start + 50]}
+        ids = ','.join(batch)
+        etag_key = f'livestreamtrap:etag:channels:{hashlib.sha1(ids.encode()).hexdigest()}'
+        etag = redis_client.get(etag_key)
+
+        def build_request(youtube):
+            request = youtube.channels().list(id=ids, part='snippet,statistics', maxResults=50)
+            if etag:
+                request.headers['If-None-Match'] = etag.decode()
+            return request
+
+        try:
+            response = execute_api_request(build_request, 'channels.list')
+        except googleapiclient.errors.HttpError as e:
+            if e.resp.status == 304:
+                not_modified += 1
+                sampled.extend(batch.values())
+                continue
+            logger.error(f"Error refreshing statistics for {len(batch)} channels: {str(e)}")
+            continue
+        except quota.QuotaExhausted:
+            logger.warning("Quota exhausted, channel statistics refresh stopped")
+            break
+
+        if response.get('etag'):
+            redis_client.set(etag_key, response['etag'], ex=settings.CHANNEL_STATS_ETAG_TTL)
+        sampled.extend(batch.values())
+
+        now = timezone.now()
+        for item in response.get('items', []):
+            channel = batch.get(item['id'])
+            if channel is None:
+                continue
+            statistics = item.get('statistics', {})
+            counts = (
+                int(statistics.get('subscriberCount', 0)),
+                int(statistics.get('viewCount', 0)),
+                int(statistics.get('videoCount', 0)),
+            )
+            thumbnail_url = item.get('snippet', {}).get('thumbnails', {}).get('high', {}).get('url')
+            thumbnail_changed = bool(thumbnail_url) and thumbnail_url != channel.thumbnail_url
+            if thumbnail_changed or counts != (channel.subscriber_count, channel.view_count, channel.video_count):
+                channel.subscriber_count, channel.view_count, channel.video_count = counts
+                if thumbnail_changed:
+                    channel.thumbnail_url = thumbnail_url
+                    thumbnails_changed.append(channel.id)
+                channel.updated_at = now
+                changed.append(channel)
+
+    YouTubeChannel.objects.bulk_update(
+        changed,
+        ['subscriber_count', 'view_count', 'video_count', 'thumbnail_url', 'updated_at'],
+        batch_size=500
+    )
+    history.record_statistics(sampled)
+    # Also pick up channels whose thumbnail was never cached
+    thumbnails_changed.extend(
+        YouTubeChannel.objects.exclude(thumbnail_url='').filter(thumbnail_1x='').values_list('id', flat=True)
+    )
+    for channel_id in set(thumbnails_changed):
+        cache_channel_thumbnail.delay(channel_id)
+    logger.info(
+        f"Channel statistics refreshed: {len(changed)} of {len(channels)} channels changed, "
+        f"{not_modified} batches not modified"
+    )
+
+
+@shared_task
+def cache_channel_thumbnail(channel_id):
+    """
+    Fetch a channel thumbnail once and store small WebP variants under MEDIA_ROOT
+
+    Does nothing while the cached variants still match the upstream URL.
+    """
+    try:
+        channel = YouTubeChannel.objects.get(id=channel_id)
+        if not channel.thumbnail_needs_refresh:
+            return
+
+        image = thumbnails.fetch_image(channel.thumbnail_url)
+        old_files = {channel.thumbnail_1x.name, channel.thumbnail_2x.name}
+        size = settings.THUMBNAIL_SIZE
+        channel.thumbnail_1x = thumbnails.make_variant(image, size, channel.channel_id)
+        channel.thumbnail_2x = thumbnails.make_variant(image, size * 2, channel.channel_id)
+        channel.thumbnail_cached_from = channel.thumbnail_url
+        channel.save(update_fields=['thumbnail_1x', 'thumbnail_2x', 'thumbnail_cached_from', 'updated_at'])
+
+        for name in old_files - {channel.thumbnail_1x.name, channel.thumbnail_2x.name}:
+            thumbnails.remove_file(name)
+
+        logger.info(f"Cached thumbnail for channel {channel.handle}")
+
+    except YouTubeChannel.DoesNotExist:
+        logger.error(f"Channel with id {channel_id} not found")
+    except Exception as e:
+        logger.error(f"Error caching thumbnail for channel {channel_id}: {str(e)}")
+
+
+@shared_task
+def reassign_orphaned_recordings():
+    """
+    Move recordings of dead recorder nodes to live ones while their stream is still on air
+
+    Recordings whose stream ended while their node was dead are finished from
+    the parts saved so far, or dropped if there are none.
+    """
+    live = set(recorders.live_nodes())
+    orphaned = Recording.objects.filter(
+        is_completed=False
+    ).exclude(node='').exclude(node__in=live).select_related('live_stream__channel')
+
+    for recording in orphaned:
+        stream = recording.live_stream
+        if stream.is_active:
+            logger.warning(f"Recorder node {recording.node} is dead, moving recording of {stream.title}")
+            dispatch_recording(recording, exclude={recording.node})
+            continue
+
+        # Detach it from the dead node first so that a failed finish is not retried every run
+        if not Recording.objects.filter(id=recording.id, node=recording.node, is_completed=False).update(node=''):
+            continue
+        logger.warning(f"Recorder node {recording.node} died before the end of {stream.title}, finishing from saved parts")
+        recording.node = ''
+        try:
+            audio_path = settings.RECORDINGS_DIR / 'audio' / f"{recording_basename(stream)}.mp3"
+            retry_recording(recording, audio_path)
+        except Exception as e:
+            logger.error(f"Error finishing orphaned recording of {stream.title}: {str(e)}")
+        finally:
+            admission.release(recording.id)
+            admit_recordings.delay()
+
+
+@shared_task
+def record_channel_activity():
+    """
+    Add the current minute of live activity to the channel statistics history
+    """
+    try:
+        live_channels = history.record_live_minutes()
+        logger.info(f"Recorded live minute for {live_channels} channels")
+    except Exception as e:
+        logger.error(f"Error recording channel activity: {str(e)}")
+
+
+@shared_task
+def rollup_channel_history():
+    """
+    Downsample the channel statistics history (minute -> hour -> day) and prune old samples
+    """
+    try:
+        for source, target in history.ROLLUPS:
+            buckets = history.roll_up(source, target)
+            logger.info(f"Rolled up {buckets} channel history buckets of {target}s")
+        deleted = history.prune()
+        logger.info(f"Pruned {deleted} expired channel history samples")
+    except Exception as e:
+        logger.error(f"Error rolling up channel history: {str(e)}")
+
+
+@shared_task
+def archive_old_recordings():
+    """
+    Move recordings older than STORAGE_TIER_AFTER_DAYS to the archive storage tier, oldest first
+    """
+    if not settings.STORAGE_TIER_AFTER_DAYS:
+        return
+    with redis_lock('storage-tiering', 6 * 3600) as acquired:
+        if not acquired:
+            logger.info("Archiving of old recordings is already running")
+            return
+
+        saved = 0
+        for recording in tiering.due_recordings(settings.STORAGE_TIER_BATCH):
+            try:
+                saved += tiering.archive(recording) or 0
+            except Exception as e:
+                logger.error(f"Error archiving recording {recording.id}: {str(e)}")
+        logger.info(f"Archiving of old recordings freed {saved} bytes")
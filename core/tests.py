@@ -0,0 +1,340 @@
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from datetime import timedelta
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from core import api_keys, quota, summary, tasks
+from core.models import LiveStream, Recording, RecordingPart, WebSubSubscription, YouTubeChannel
+
+
+class JoinPartsTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.temp_dir = Path(self.tmp.name)
+        self.commands = []
+        self.concat_lists = []
+
+    def fake_ffmpeg(self, cmd, **kwargs):
+        self.commands.append(cmd)
+        if '-f' in cmd and cmd[cmd.index('-f') + 1] == 'concat':
+            self.concat_lists.append(Path(cmd[cmd.index('-i') + 1]).read_text())
+        Path(cmd[-2]).write_bytes(b'audio')
+        return mock.Mock(returncode=0, stderr='')
+
+    def test_mixed_parts_are_reduced_to_audio_before_concat(self):
+        parts = [
+            self.temp_dir / 'capture_part1.f140.ts',
+            self.temp_dir / 'capture_part2.mp4',
+            self.temp_dir / 'capture_part3.m4a',
+        ]
+        output = self.temp_dir / 'joined.m4a'
+
+        with override_settings(TEMP_DIR=self.temp_dir, FFMPEG_BIN='ffmpeg'), \
+                mock.patch.object(tasks.subprocess, 'run', side_effect=self.fake_ffmpeg):
+            tasks.join_parts(parts, output, [0.0, 2.5, 0.0])
+
+        remuxes, concat = self.commands[:-1], self.commands[-1]
+        self.assertEqual(len(remuxes), 3)
+        for part, cmd in zip(parts, remuxes):
+            self.assertEqual(cmd[cmd.index('-i') + 1], str(part))
+            self.assertEqual(cmd[cmd.index('-map') + 1], '0:a:0')
+            self.assertEqual(cmd[cmd.index('-c') + 1], 'copy')
+            self.assertTrue(cmd[-2].endswith('.m4a'))
+
+        # Only the audio-only intermediates are concatenated, in order, with the overlap skipped
+        listed = [line for line in self.concat_lists[0].splitlines() if line.startswith('file ')]
+        self.assertEqual(listed, [f"file '{cmd[-2]}'" for cmd in remuxes])
+        self.assertIn('inpoint 2.500', self.concat_lists[0])
+        self.assertEqual(concat[-2], str(output))
+
+        # Intermediates and the list are cleaned up, the output is kept
+        self.assertEqual(sorted(p.name for p in self.temp_dir.iterdir()), ['joined.m4a'])
+
+    def test_failed_extraction_cleans_up(self):
+        def failing(cmd, **kwargs):
+            return mock.Mock(returncode=1, stderr='Stream map 0:a:0 matches no streams')
+
+        with override_settings(TEMP_DIR=self.temp_dir, FFMPEG_BIN='ffmpeg'), \
+                mock.patch.object(tasks.subprocess, 'run', side_effect=failing):
+            with self.assertRaises(Exception):
+                tasks.join_parts([self.temp_dir / 'a.mp4', self.temp_dir / 'b.m4a'], self.temp_dir / 'joined.m4a')
+
+        self.assertEqual(list(self.temp_dir.iterdir()), [])
+
+
+
+class RetryRecordingTests(TestCase):
+    """Failed captures are kept as parts and joined once the stream is over"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        media = Path(tmp.name)
+        (media / 'recordings' / 'videos').mkdir(parents=True)
+        (media / 'recordings' / 'audio').mkdir(parents=True)
+        (media / 'temp').mkdir()
+        settings = override_settings(
+            MEDIA_ROOT=media,
+            RECORDINGS_DIR=media / 'recordings',
+            TEMP_DIR=media / 'temp',
+            YTARCHIVE_BIN='ytarchive',
+            FFMPEG_BIN='ffmpeg',
+            LIVE_HLS_ENABLED=False,
+            RECORDING_MAX_ATTEMPTS=3
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.videos = media / 'recordings' / 'videos'
+
+        channel = YouTubeChannel.objects.create(channel_id='UCtest', handle='test', title='Test')
+        self.stream = LiveStream.objects.create(
+            channel=channel, stream_id='abcdefghijk', title='Stream', is_active=True, is_recording=True
+        )
+        self.recording = Recording.objects.create(live_stream=self.stream)
+
+        # Recorder node bookkeeping and admission live in Redis
+        recorders = mock.patch.object(tasks, 'recorders')
+        self.recorders = recorders.start()
+        self.addCleanup(recorders.stop)
+        self.recorders.current_node.return_value = 'node1'
+        self.recorders.is_draining.return_value = False
+        self.recorders.choose_node.return_value = 'node1'
+        self.recorders.select_quality.return_value = 'audio_only'
+        self.recorders.HandoffWatch.return_value = mock.Mock(capturing_since=None, handed_off_at=None)
+        for target in (
+            mock.patch.object(tasks, 'admission'),
+            mock.patch.object(tasks.admit_recordings, 'delay'),
+            mock.patch.object(tasks.record_stream, 'apply_async'),
+        ):
+            target.start()
+            self.addCleanup(target.stop)
+
+        self.ffmpeg_commands = []
+
+    def fake_ytarchive(self, returncode):
+        def popen(cmd, **kwargs):
+            output = Path(cmd[cmd.index('-o') + 1]).with_suffix('.mp4')
+            output.write_bytes(b'capture')
+            return mock.Mock(returncode=returncode, communicate=mock.Mock(return_value=('', 'connection reset')))
+        return popen
+
+    def fake_ffmpeg(self, cmd, **kwargs):
+        self.ffmpeg_commands.append(cmd)
+        Path(cmd[-2]).write_bytes(b'audio')
+        return mock.Mock(returncode=0, stderr='')
+
+    def record(self, returncode):
+        with mock.patch.object(tasks.subprocess, 'Popen', side_effect=self.fake_ytarchive(returncode)), \
+                mock.patch.object(tasks.subprocess, 'run', side_effect=self.fake_ffmpeg):
+            tasks.record_stream(self.recording.id)
+        self.recording.refresh_from_db()
+
+    def test_failed_capture_is_kept_and_retried(self):
+        self.record(returncode=1)
+
+        self.assertFalse(self.recording.is_completed)
+        self.assertEqual(self.recording.attempts, 1)
+        part = self.recording.parts.get()
+        self.assertFalse(part.is_complete)
+        self.assertTrue((self.videos / Path(part.video_path.name).name).exists())
+        tasks.record_stream.apply_async.assert_called_once_with(
+            (self.recording.id,), queue=self.recorders.queue_name.return_value,
+            countdown=tasks.settings.RECORDING_RETRY_BASE_DELAY
+        )
+        # The slot stays taken for the retry
+        tasks.admission.release.assert_not_called()
+
+    def test_retry_is_captured_as_a_new_part_and_joined(self):
+        self.record(returncode=1)
+        self.record(returncode=0)
+
+        self.assertTrue(self.recording.is_completed)
+        self.assertEqual(self.recording.attempts, 2)
+        self.assertFalse(RecordingPart.objects.exists())
+        remuxes = [cmd for cmd in self.ffmpeg_commands if '-map' in cmd and '0:a:0' in cmd]
+        self.assertEqual(len(remuxes), 2)
+        self.assertIn('_part2', remuxes[1][remuxes[1].index('-i') + 1])
+        self.assertTrue(self.recording.original_video_path.name.endswith('.m4a'))
+        tasks.admission.release.assert_called_once_with(self.recording.id)
+
+    def test_retry_is_not_capped_by_the_previous_quality(self):
+        Recording.objects.filter(id=self.recording.id).update(max_quality='best')
+        self.recorders.select_quality.side_effect = ['audio_only', 'best']
+        self.record(returncode=1)
+        self.assertEqual(self.recording.quality, 'audio_only')
+
+        self.record(returncode=0)
+
+        self.assertEqual(self.recording.quality, 'best')
+        self.assertEqual(self.recording.max_quality, 'best')
+        for call in self.recorders.select_quality.call_args_list:
+            self.assertEqual(call.kwargs['ceiling'], 'best')
+
+    def test_partial_recording_is_finished_when_stream_ends(self):
+        self.record(returncode=1)
+        self.stream.is_active = False
+        self.stream.save()
+        tasks.record_stream.apply_async.reset_mock()
+
+        audio_path = tasks.settings.RECORDINGS_DIR / 'audio' / 'partial.mp3'
+        with mock.patch.object(tasks.subprocess, 'run', side_effect=self.fake_ffmpeg):
+            self.assertFalse(tasks.retry_recording(self.recording, audio_path))
+
+        self.recording.refresh_from_db()
+        self.assertTrue(self.recording.is_completed)
+        self.assertEqual(self.recording.audio_path.name, 'recordings/audio/partial.mp3')
+        tasks.record_stream.apply_async.assert_not_called()
+
+    def test_recording_without_parts_is_dropped(self):
+        self.stream.is_active = False
+        self.stream.save()
+        audio_path = tasks.settings.RECORDINGS_DIR / 'audio' / 'empty.mp3'
+
+        self.assertFalse(tasks.retry_recording(self.recording, audio_path))
+        self.assertFalse(Recording.objects.filter(id=self.recording.id).exists())
+        self.stream.refresh_from_db()
+        self.assertFalse(self.stream.is_recording)
+
+    def test_recording_of_dead_node_is_finished_after_stream_ended(self):
+        self.record(returncode=1)
+        Recording.objects.filter(id=self.recording.id).update(node='node1')
+        self.stream.is_active = False
+        self.stream.save()
+        self.recorders.live_nodes.return_value = {}
+        tasks.record_stream.apply_async.reset_mock()
+
+        with mock.patch.object(tasks.subprocess, 'run', side_effect=self.fake_ffmpeg):
+            tasks.reassign_orphaned_recordings()
+
+        self.recording.refresh_from_db()
+        self.assertTrue(self.recording.is_completed)
+        self.assertEqual(self.recording.node, '')
+        tasks.admission.release.assert_called_once_with(self.recording.id)
+        tasks.record_stream.apply_async.assert_not_called()
+
+    def test_recording_of_dead_node_is_moved_while_live(self):
+        Recording.objects.filter(id=self.recording.id).update(node='node1')
+        self.recorders.live_nodes.return_value = {'node2': {}}
+        self.recorders.choose_node.return_value = 'node2'
+
+        tasks.reassign_orphaned_recordings()
+
+        self.recording.refresh_from_db()
+        self.assertEqual(self.recording.node, 'node2')
+        self.recorders.choose_node.assert_called_once_with(exclude={'node1'})
+        tasks.admission.release.assert_not_called()
+
+    def test_slot_of_dead_node_is_released_after_stream_ended(self):
+        Recording.objects.filter(id=self.recording.id).update(node='node1')
+        self.stream.is_active = False
+        self.stream.save()
+        self.recorders.live_nodes.return_value = {}
+        tasks.admission.admitted_ids.return_value = [self.recording.id]
+        tasks.admission.pending.return_value = []
+
+        with mock.patch.object(tasks, 'redis_lock') as lock:
+            lock.return_value.__enter__.return_value = True
+            tasks.admit_recordings()
+
+        tasks.admission.release.assert_called_once_with(self.recording.id)
+
+    def test_overlapping_parts_are_trimmed(self):
+        start = timezone.now()
+        parts = [
+            RecordingPart(capture_started=start, capture_finished=start + timedelta(seconds=60)),
+            RecordingPart(capture_started=start + timedelta(seconds=58), capture_finished=start + timedelta(seconds=90)),
+            RecordingPart(capture_started=start + timedelta(seconds=95), capture_finished=start + timedelta(seconds=120)),
+        ]
+        self.assertEqual(tasks.overlaps(parts), [0.0, 2.0, 0.0])
+
+@override_settings(WEBSUB_LEASE_SECONDS=3600)
+class WebSubVerificationTests(TestCase):
+    def setUp(self):
+        self.channel = YouTubeChannel.objects.create(channel_id='UCtest', handle='test', title='Test')
+        self.subscription = WebSubSubscription.objects.create(channel=self.channel, secret='secret')
+
+    def verify(self, **params):
+        query = {
+            'hub.mode': 'subscribe',
+            'hub.topic': self.subscription.topic,
+            'hub.challenge': 'challenge',
+            **params
+        }
+        return self.client.get(f'/websub/{self.channel.id}/', query)
+
+    def lease(self):
+        self.subscription.refresh_from_db()
+        return (self.subscription.lease_expires_at - self.subscription.verified_at).total_seconds()
+
+    def test_lease_from_hub_is_stored(self):
+        response = self.verify(**{'hub.lease_seconds': '86400'})
+        self.assertEqual(response.content, b'challenge')
+        self.assertEqual(self.lease(), 86400)
+
+    def test_bad_lease_falls_back_to_requested_lease(self):
+        for value in ('abc', '-5', '0', '99999999999999'):
+            with self.subTest(value=value):
+                response = self.verify(**{'hub.lease_seconds': value})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content, b'challenge')
+                self.assertEqual(self.lease(), 3600)
+
+    def test_challenge_only_for_pending_subscription(self):
+        self.subscription.is_active = False
+        self.subscription.save()
+        self.assertEqual(self.verify().status_code, 404)
+        self.assertEqual(self.verify(**{'hub.topic': 'https://example.com/other'}).status_code, 404)
+
+
+class StreamLatencyViewTests(TestCase):
+    def test_days_out_of_range_is_rejected(self):
+        for days in ('0', '-5', '99999999999', 'abc'):
+            with self.subTest(days=days):
+                response = self.client.get('/api/stream-latency/', {'days': days})
+                self.assertEqual(response.status_code, 400)
+
+    def test_days_within_range(self):
+        response = self.client.get('/api/stream-latency/', {'days': '30'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['days'], 30)
+
+
+@override_settings(CHANNEL_SUMMARY_TTL=300)
+class ChannelSummaryTests(TestCase):
+    def test_rebuilt_summary_expires(self):
+        channel = YouTubeChannel.objects.create(channel_id='UCtest', handle='test', title='Test')
+        with mock.patch.object(summary, 'get_redis') as get_redis:
+            pipe = get_redis.return_value.pipeline.return_value
+            self.assertIn(channel.id, summary.rebuild())
+        pipe.expire.assert_called_once_with(summary.SUMMARY_KEY, 300)
+        pipe.execute.assert_called_once_with()
+
+
+@override_settings(YOUTUBE_KEY_RATE=5, YOUTUBE_KEY_BURST=10)
+class RateLimitTests(TestCase):
+    def test_rate_limit_is_not_reported_as_exhausted_quota(self):
+        with mock.patch.object(tasks, 'execute_api_request', side_effect=api_keys.RateLimited):
+            result = tasks.check_channel_exists('@test')
+        self.assertFalse(result['exists'])
+        self.assertNotIn('квота', result['error'])
+
+    def test_active_streams_check_resumes_after_refill(self):
+        channel = YouTubeChannel.objects.create(channel_id='UCtest', handle='test', title='Test')
+        LiveStream.objects.create(channel=channel, stream_id='abcdefghijk', title='Stream', is_active=True)
+        with mock.patch.object(tasks, 'execute_api_request', side_effect=api_keys.RateLimited), \
+                mock.patch.object(tasks.check_active_streams, 'apply_async') as apply_async:
+            tasks.check_active_streams()
+        apply_async.assert_called_once_with(countdown=2)
+
+    def test_active_streams_check_stops_on_exhausted_quota(self):
+        channel = YouTubeChannel.objects.create(channel_id='UCtest', handle='test', title='Test')
+        LiveStream.objects.create(channel=channel, stream_id='abcdefghijk', title='Stream', is_active=True)
+        with mock.patch.object(tasks, 'execute_api_request', side_effect=quota.QuotaExhausted), \
+                mock.patch.object(tasks.check_active_streams, 'apply_async') as apply_async:
+            tasks.check_active_streams()
+        apply_async.assert_not_called()
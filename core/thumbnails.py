@@ -0,0 +1,59 @@
+import hashlib
+import io
+import logging
+
+import requests
+from django.conf import settings
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+THUMBNAILS_SUBDIR = 'thumbnails'
+
+
+def thumbnails_dir():
+    path = settings.MEDIA_ROOT / THUMBNAILS_SUBDIR
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def fetch_image(url):
+    """Download an image and return it as a Pillow image"""
+    response = requests.get(url, timeout=settings.THUMBNAIL_FETCH_TIMEOUT)
+    response.raise_for_status()
+    image = Image.open(io.BytesIO(response.content))
+    image.load()
+    return image
+
+
+def make_variant(image, size, prefix):
+    """
+    Resize an image to a square WebP of `size` pixels and store it under MEDIA_ROOT.
+
+    The file name contains a hash of the encoded bytes, so a changed image gets a
+    new URL and the old one can be cached forever. Returns the path relative to
+    MEDIA_ROOT.
+    """
+    variant = image.convert('RGB')
+    variant.thumbnail((size, size), Image.LANCZOS)
+    buffer = io.BytesIO()
+    variant.save(buffer, 'WEBP', quality=settings.THUMBNAIL_WEBP_QUALITY, method=6)
+    data = buffer.getvalue()
+
+    name = f'{prefix}_{size}_{hashlib.sha256(data).hexdigest()[:16]}.webp'
+    path = thumbnails_dir() / name
+    if not path.exists():
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_bytes(data)
+        tmp_path.replace(path)
+    return f'{THUMBNAILS_SUBDIR}/{name}'
+
+
+def remove_file(relative_path):
+    if not relative_path:
+        return
+    path = settings.MEDIA_ROOT / relative_path
+    try:
+        path.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning(f"Could not remove old thumbnail {path}: {str(e)}")
@@ -0,0 +1,128 @@
+import logging
+import os
+import shutil
+import subprocess
+from datetime import timedelta
+from pathlib import Path
+
+import psutil
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Recording
+from . import metrics, waveform
+
+logger = logging.getLogger(__name__)
+
+AUDIO_SUBDIR = 'recordings/audio'
+# Mount point for cheaper storage; it stays under MEDIA_ROOT so that download URLs keep working
+ARCHIVE_SUBDIR = 'recordings/archive'
+OPUS_EXTENSION = '.opus'
+
+
+def due_recordings(limit, now=None):
+    """Completed recordings older than STORAGE_TIER_AFTER_DAYS that are still on the hot tier, oldest first"""
+    cutoff = (now or timezone.now()) - timedelta(days=settings.STORAGE_TIER_AFTER_DAYS)
+    return list(Recording.objects.filter(
+        is_completed=True,
+        archived_at__isnull=True,
+        recording_finished__lt=cutoff
+    ).exclude(audio_path='').exclude(audio_path__isnull=True).order_by('recording_finished')[:limit])
+
+
+def idle_priority(pid):
+    """
+    Lower a child process to the lowest CPU and I/O priority, so it never competes with recordings
+
+    Set from the parent after the start: preexec_fn is unsafe while the worker runs threads.
+    """
+    process = psutil.Process(pid)
+    process.nice(19)
+    try:
+        process.ionice(psutil.IOPRIO_CLASS_IDLE)
+    except (AttributeError, OSError, psutil.Error):
+        # I/O priorities are only available on Linux
+        pass
+
+
+def encode_opus(input_path, output_path):
+    """Re-encode audio with the Opus speech profile at STORAGE_TIER_OPUS_BITRATE"""
+    ffmpeg_cmd = [
+        settings.FFMPEG_BIN,
+        '-v', 'error',
+        '-i', str(input_path),
+        '-map', 'a',
+        '-map_metadata', '0',
+        '-ac', '1',
+        '-c:a', 'libopus',
+        '-b:a', settings.STORAGE_TIER_OPUS_BITRATE,
+        '-application', 'voip',
+        '-threads', '1',
+        '-f', 'ogg',
+        str(output_path),
+        '-y'
+    ]
+    with metrics.observe_duration(metrics.FFMPEG_DURATION):
+        process = subprocess.Popen(ffmpeg_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        try:
+            idle_priority(process.pid)
+        except psutil.Error:
+            # ffmpeg already exited
+            pass
+        _, stderr = process.communicate()
+    if process.returncode != 0:
+        raise Exception(f"FFmpeg Opus encoding failed: {stderr}")
+
+
+def archive(recording):
+    """
+    Move the audio of a recording to the archive tier.
+
+    The new file is written next to its final name and renamed into place, then
+    the database row is switched over with a conditional update, so a download
+    always gets either the old or the new file. The old file is removed last.
+    Returns the number of bytes freed, or None if the recording changed meanwhile.
+    """
+    source = Path(recording.audio_path.path)
+    subdir = ARCHIVE_SUBDIR if settings.STORAGE_TIER_MOVE else AUDIO_SUBDIR
+    extension = OPUS_EXTENSION if settings.STORAGE_TIER_REENCODE else source.suffix
+    target = settings.MEDIA_ROOT / subdir / f'{source.stem}{extension}'
+    target.parent.mkdir(parents=True, exist_ok=True)
+    old_size = source.stat().st_size
+
+    if target != source:
+        tmp_path = target.with_name(f'{target.name}.part')
+        try:
+            if settings.STORAGE_TIER_REENCODE:
+                encode_opus(source, tmp_path)
+            else:
+                # May cross file systems, so copy rather than rename
+                shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, target)
+        finally:
+            if tmp_path.exists():
+                os.remove(tmp_path)
+
+    updated = Recording.objects.filter(
+        id=recording.id,
+        audio_path=recording.audio_path.name
+    ).update(
+        audio_path=f'{subdir}/{target.name}',
+        file_size=target.stat().st_size,
+        archived_at=timezone.now()
+    )
+    if not updated:
+        if target != source:
+            os.remove(target)
+        logger.info(f"Recording {recording.id} changed while archiving, left as is")
+        return None
+
+    if target != source:
+        # Byte offsets of the MP3 frames do not apply to the new encoding
+        if settings.STORAGE_TIER_REENCODE and recording.waveform_path and os.path.isfile(recording.waveform_path.path):
+            waveform.drop_seek_index(Path(recording.waveform_path.path))
+        os.remove(source)
+    saved = old_size - target.stat().st_size
+    metrics.ARCHIVED_BYTES_SAVED.inc(max(saved, 0))
+    logger.info(f"Archived recording {recording.id} to {target.name}: {old_size} -> {target.stat().st_size} bytes")
+    return saved
@@ -0,0 +1,73 @@
+import logging
+from collections import defaultdict
+
+from django.utils import timezone
+
+from .models import StreamEvent
+
+logger = logging.getLogger(__name__)
+
+# Stages between two lifecycle events, in pipeline order
+STAGES = [
+    ('poll_delay', StreamEvent.WENT_LIVE, StreamEvent.DETECTED),
+    ('start_queue_wait', StreamEvent.DETECTED, StreamEvent.RECORDING_QUEUED),
+    ('admission_wait', StreamEvent.RECORDING_QUEUED, StreamEvent.RECORDING_ADMITTED),
+    ('recorder_queue_wait', StreamEvent.RECORDING_ADMITTED, StreamEvent.RECORDER_STARTED),
+    ('recorder_startup', StreamEvent.RECORDER_STARTED, StreamEvent.CAPTURE_STARTED),
+    ('capture', StreamEvent.CAPTURE_STARTED, StreamEvent.CAPTURE_FINISHED),
+    ('conversion', StreamEvent.CAPTURE_FINISHED, StreamEvent.CONVERSION_FINISHED),
+    ('db_write', StreamEvent.CONVERSION_FINISHED, StreamEvent.RECORDING_SAVED),
+    ('live_to_capture', StreamEvent.WENT_LIVE, StreamEvent.CAPTURE_STARTED),
+    ('end_to_audio_ready', StreamEvent.STREAM_ENDED, StreamEvent.RECORDING_SAVED),
+]
+
+PERCENTILES = (50, 90, 99)
+
+
+def record(stream_id, event, at=None):
+    """
+    Append a lifecycle event to the timeline of a stream.
+
+    Tracing must never break the pipeline, so failures are only logged.
+    """
+    try:
+        StreamEvent.objects.create(live_stream_id=stream_id, event=event, at=at or timezone.now())
+    except Exception as e:
+        logger.error(f"Error recording {event} event of stream {stream_id}: {str(e)}")
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a sorted list"""
+    index = max(0, -(-len(values) * p // 100) - 1)
+    return values[index]
+
+
+def stage_latencies(since):
+    """
+    Per-stage latency percentiles, in seconds, over streams that went live after `since`.
+
+    The first occurrence of an event counts, so a retried step is measured
+    from its first attempt.
+    """
+    first_seen = defaultdict(dict)
+    events = StreamEvent.objects.filter(
+        live_stream__actual_start_time__gte=since
+    ).values_list('live_stream_id', 'event', 'at').order_by('at')
+    for stream_id, event, at in events.iterator():
+        first_seen[stream_id].setdefault(event, at)
+
+    durations = defaultdict(list)
+    for timeline in first_seen.values():
+        for stage, start, end in STAGES:
+            if start in timeline and end in timeline:
+                durations[stage].append((timeline[end] - timeline[start]).total_seconds())
+
+    result = {}
+    for stage, _, _ in STAGES:
+        values = sorted(durations[stage])
+        if not values:
+            continue
+        result[stage] = {'count': len(values), 'max': round(values[-1], 3)}
+        for p in PERCENTILES:
+            result[stage][f'p{p}'] = round(percentile(values, p), 3)
+    return {'streams': len(first_seen), 'stages': result}
@@ -5,9 +5,17 @@ urlpatterns = [
     path('', views.home, name='home'),
     path('tasks/', views.tasks_view, name='tasks'),
     path('downloads/', views.downloads_view, name='downloads'),
+    path('downloads/export.zip', views.export_recordings, name='export_recordings'),
+    path('search/', views.search_view, name='search'),
     path('channel/<int:channel_id>/delete/', views.delete_channel, name='delete_channel'),
     path('channel/<int:channel_id>/toggle-monitoring/', views.toggle_monitoring, name='toggle_monitoring'),
     path('task/<int:task_id>/stop/', views.stop_task, name='stop_task'),
     path('recording/<int:recording_id>/delete/', views.delete_recording, name='delete_recording'),
     path('api/live-counts/', views.get_live_counts, name='get_live_counts'),
+    path('api/search/', views.search_api, name='search_api'),
+    path('api/channels/<int:channel_id>/history/', views.channel_history_view, name='channel_history'),
+    path('api/stream-latency/', views.stream_latency_view, name='stream_latency'),
+    path('metrics', views.metrics_view, name='metrics'),
+    path('thumbnails/<str:name>', views.thumbnail_view, name='thumbnail'),
+    path('websub/<int:channel_id>/', views.websub_callback, name='websub_callback'),
 ]
\ No newline at end of file
@@ -1,17 +1,28 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.contrib import messages
 from django.views.decorators.http import require_http_methods
+from django.views.decorators.csrf import csrf_exempt
+from django.utils import timezone
+from datetime import timedelta
 from django.db import transaction
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+from django.utils.dateparse import parse_datetime
 import logging
-from .models import YouTubeChannel, MonitoringTask, LiveStream, Recording
-from .forms import ChannelHandleForm
+from .models import YouTubeChannel, MonitoringTask, LiveStream, Recording, WebSubSubscription
+from .forms import ChannelHandleForm, RecordingExportForm
+from .metrics import generate_metrics
 from .tasks import (
     check_channel_exists,
     update_channel_live_status,
     start_monitoring_channel,
-    stop_monitoring_channel
+    stop_monitoring_channel,
+    cache_channel_thumbnail,
+    check_video_status
 )
+from . import export, history, search, summary, thumbnails, timeline, websub
 import json
 
 logger = logging.getLogger(__name__)
@@ -44,6 +55,7 @@ def home(request):
                         view_count=result.get('view_count', 0),
                         video_count=result.get('video_count', 0)
                     )
+                    cache_channel_thumbnail.delay(channel.id)
 
                     if result.get('note'):
                         messages.warning(request, f'Канал @{handle} найден. {result["note"]}')
@@ -61,15 +73,17 @@ def home(request):
     else:
         form = ChannelHandleForm()
 
-    # Prepare channel data for template
+    # Prepare channel data for template; task and live status come from the cached summary
+    summaries = summary.get_all()
     channel_data = []
     for index, channel in enumerate(channels, 1):
-        has_task = hasattr(channel, 'monitoring_task') and channel.monitoring_task.is_active
+        channel_summary = summaries.get(channel.id, {})
         channel_data.append({
             'index': index,
             'channel': channel,
-            'has_task': has_task,
-            'live_count': channel.current_live_count
+            'has_task': channel_summary.get('has_task', False),
+            'live_count': channel_summary.get('live_count', 0),
+            'recording_count': channel_summary.get('recording_count', 0)
         })
 
     context = {
@@ -103,7 +117,9 @@ def delete_channel(request, channel_id):
         # Delete all live streams
         LiveStream.objects.filter(channel=channel).delete()
 
-        # Finally delete the channel itself
+        # Finally delete the channel itself and its cached thumbnails
+        thumbnails.remove_file(channel.thumbnail_1x.name)
+        thumbnails.remove_file(channel.thumbnail_2x.name)
         channel.delete()
 
         messages.success(request, f'Канал @{channel_name} полностью удалён из базы данных.')
@@ -176,11 +192,28 @@ def downloads_view(request):
         })
 
     context = {
-        'download_data': download_data
+        'download_data': download_data,
+        'export_form': RecordingExportForm()
     }
     return render(request, 'core/downloads.html', context)
 
 
+@require_http_methods(['GET'])
+def export_recordings(request):
+    """Stream the selected or filtered recordings as a single ZIP archive"""
+    form = RecordingExportForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    filename = f"recordings_{timezone.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    response = StreamingHttpResponse(
+        export.stream_zip(form.recordings().iterator()),
+        content_type='application/zip'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 @require_http_methods(['POST'])
 def delete_recording(request, recording_id):
     recording = get_object_or_404(Recording, id=recording_id, is_completed=True)
@@ -192,10 +225,173 @@ def delete_recording(request, recording_id):
 
 def get_live_counts(request):
     """AJAX endpoint to get current live counts for all channels"""
-    channels = YouTubeChannel.objects.all()
-    data = {}
+    data = {
+        channel_id: channel_summary['live_count']
+        for channel_id, channel_summary in summary.get_all().items()
+    }
+    return JsonResponse(data)
+
 
-    for channel in channels:
-        data[channel.id] = channel.current_live_count
+def search_view(request):
+    query = request.GET.get('q', '').strip()
+    streams = search.search_streams(query, settings.SEARCH_RESULTS_LIMIT) if query else []
+
+    context = {
+        'query': query,
+        'streams': streams
+    }
+    return render(request, 'core/search.html', context)
+
+
+def search_api(request):
+    """JSON full-text search over stream titles, descriptions and channel titles"""
+    query = request.GET.get('q', '').strip()
+    streams = search.search_streams(query, settings.SEARCH_RESULTS_LIMIT) if query else []
+
+    results = []
+    for stream in streams:
+        recording = getattr(stream, 'recording', None)
+        results.append({
+            'id': stream.id,
+            'stream_id': stream.stream_id,
+            'title': stream.title,
+            'channel': stream.channel.handle,
+            'channel_title': stream.channel.title,
+            'actual_start_time': stream.actual_start_time,
+            'download_url': recording.download_url if recording else None
+        })
+    return JsonResponse({'query': query, 'results': results})
 
-    return JsonResponse(data)
\ No newline at end of file
+
+def stream_latency_view(request):
+    """
+    Per-stage latency percentiles of the stream lifecycle over the last `days` days
+
+    Stages from WENT_LIVE (poll_delay, live_to_capture) only cover streams whose
+    start time YouTube reported; streams found by polling have no known start.
+    """
+    try:
+        days = int(request.GET.get('days', settings.STREAM_LATENCY_WINDOW_DAYS))
+    except ValueError:
+        return JsonResponse({'error': 'days must be an integer'}, status=400)
+    if not 1 <= days <= settings.STREAM_LATENCY_MAX_DAYS:
+        return JsonResponse(
+            {'error': f'days must be between 1 and {settings.STREAM_LATENCY_MAX_DAYS}'},
+            status=400
+        )
+
+    since = timezone.now() - timedelta(days=days)
+    data = timeline.stage_latencies(since)
+    data['days'] = days
+    data['notes'] = {
+        stage: 'Only streams with a start time reported by YouTube; polled streams are not counted'
+        for stage in ('poll_delay', 'live_to_capture')
+    }
+    return JsonResponse(data)
+
+
+def channel_history_view(request, channel_id):
+    """
+    Statistics history of a channel between `start` and `end` (ISO 8601, default: the last 7 days).
+
+    The resolution (minute, hour or day) is picked from the range unless given explicitly.
+    """
+    channel = get_object_or_404(YouTubeChannel, id=channel_id)
+    resolutions = {label: value for value, label in (
+        (history.ChannelStatSample.MINUTE, 'minute'),
+        (history.ChannelStatSample.HOUR, 'hour'),
+        (history.ChannelStatSample.DAY, 'day'),
+    )}
+
+    def parse(name, default):
+        if name not in request.GET:
+            return default
+        try:
+            value = parse_datetime(request.GET[name])
+        except ValueError:
+            return None
+        if value is not None and timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value
+
+    # The default start depends on end, so end is parsed and checked first
+    end = parse('end', timezone.now())
+    if end is None:
+        return JsonResponse({'error': 'end must be an ISO 8601 datetime'}, status=400)
+    start = parse('start', end - timedelta(days=7))
+    if start is None:
+        return JsonResponse({'error': 'start must be an ISO 8601 datetime'}, status=400)
+    if start >= end:
+        return JsonResponse({'error': 'start must be before end'}, status=400)
+
+    resolution = request.GET.get('resolution')
+    if resolution is not None and resolution not in resolutions:
+        return JsonResponse({'error': 'resolution must be minute, hour or day'}, status=400)
+
+    resolution, points = history.series(channel.id, start, end, resolutions.get(resolution))
+    return JsonResponse({
+        'channel_id': channel.channel_id,
+        'resolution': next(label for label, value in resolutions.items() if value == resolution),
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'points': [
+            {**point, 'bucket': point['bucket'].isoformat()}
+            for point in points
+        ],
+    })
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint"""
+    body, content_type = generate_metrics()
+    return HttpResponse(body, content_type=content_type)
+
+
+def thumbnail_view(request, name):
+    """Serve a cached channel thumbnail; names are content-hashed so they never change"""
+    response = serve(request, name, document_root=settings.MEDIA_ROOT / thumbnails.THUMBNAILS_SUBDIR)
+    patch_cache_control(response, public=True, max_age=settings.THUMBNAIL_CACHE_MAX_AGE, immutable=True)
+    return response
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+def websub_callback(request, channel_id):
+    """WebSub callback: answers hub verification requests and receives feed notifications"""
+    subscription = get_object_or_404(
+        WebSubSubscription.objects.select_related('channel'),
+        channel_id=channel_id
+    )
+
+    if request.method == 'GET':
+        mode = request.GET.get('hub.mode')
+        challenge = request.GET.get('hub.challenge')
+        if request.GET.get('hub.topic') != subscription.topic or not challenge:
+            return HttpResponse(status=404)
+
+        if mode == 'subscribe':
+            if not subscription.is_active:
+                return HttpResponse(status=404)
+            lease_seconds = websub.parse_lease_seconds(request.GET.get('hub.lease_seconds'))
+            subscription.verified_at = timezone.now()
+            subscription.lease_expires_at = subscription.verified_at + timedelta(seconds=lease_seconds)
+            subscription.save(update_fields=['verified_at', 'lease_expires_at', 'updated_at'])
+            logger.info(f"WebSub subscription verified for @{subscription.channel.handle}")
+        elif mode == 'unsubscribe':
+            if subscription.is_active:
+                return HttpResponse(status=404)
+        else:
+            logger.warning(f"WebSub {mode} for @{subscription.channel.handle}: {request.GET.get('hub.reason', '')}")
+
+        return HttpResponse(challenge, content_type='text/plain')
+
+    # Notifications with a bad signature are acknowledged but ignored, as the spec requires
+    if not websub.verify_signature(subscription.secret, request.body, request.headers.get('X-Hub-Signature')):
+        logger.warning(f"WebSub notification with invalid signature for @{subscription.channel.handle}")
+        return HttpResponse(status=204)
+
+    for video_id, feed_channel_id in websub.parse_notification(request.body):
+        if feed_channel_id == subscription.channel.channel_id:
+            check_video_status.delay(video_id)
+
+    return HttpResponse(status=204)
@@ -0,0 +1,199 @@
+import logging
+import mmap
+import os
+import struct
+import subprocess
+import sys
+from array import array
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+WAVEFORMS_SUBDIR = 'recordings/waveforms'
+
+# Sidecar layout (little-endian):
+#   header: magic, version, peaks per second, seek interval in seconds,
+#           duration in milliseconds, peak pair count, seek offset count
+#   int8[2 * peak pair count]  min/max pairs of the mono signal, scaled to -128..127
+#   uint32[seek offset count]  byte offset of the MP3 frame starting each seek interval
+SIDECAR_MAGIC = b'LSTW'
+SIDECAR_VERSION = 1
+SIDECAR_HEADER = struct.Struct('<4sHHHIII')
+
+DECODE_SAMPLE_RATE = 8000
+
+# MPEG audio header tables, indexed by version bits (3 = MPEG1, 2 = MPEG2, 0 = MPEG2.5)
+MP3_BITRATES = {
+    3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+MP3_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    0: (11025, 12000, 8000),
+}
+
+
+def sidecar_path_for(audio_path):
+    """Location of the sidecar for an MP3 under RECORDINGS_DIR"""
+    path = settings.MEDIA_ROOT / WAVEFORMS_SUBDIR / f'{audio_path.stem}.peaks'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def compute_peaks(audio_path, peaks_per_second):
+    """
+    Decode an audio file to 8 kHz mono PCM with ffmpeg and return min/max pairs per bucket.
+
+    The PCM is streamed from ffmpeg bucket by bucket, so memory use does not
+    depend on the length of the recording.
+    """
+    samples_per_bucket = max(1, DECODE_SAMPLE_RATE // peaks_per_second)
+    bucket_bytes = samples_per_bucket * 2
+    peaks = array('b')
+
+    process = subprocess.Popen(
+        [
+            settings.FFMPEG_BIN,
+            '-v', 'error',
+            '-i', str(audio_path),
+            '-ac', '1',
+            '-ar', str(DECODE_SAMPLE_RATE),
+            '-f', 's16le',
+            '-'
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            chunk = process.stdout.read(bucket_bytes)
+            if len(chunk) < 2:
+                break
+            samples = array('h', chunk[:len(chunk) - len(chunk) % 2])
+            if sys.byteorder == 'big':
+                samples.byteswap()
+            peaks.append(min(samples) >> 8)
+            peaks.append(max(samples) >> 8)
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+
+    if returncode != 0:
+        raise Exception(f"FFmpeg decoding of {audio_path} failed with code {returncode}")
+    return peaks
+
+
+def parse_frame_header(header):
+    """Return (frame length, samples per frame, sample rate) of an MPEG Layer III header, or None"""
+    if header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03
+    layer = (header[1] >> 1) & 0x03
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 0x03
+    padding = (header[2] >> 1) & 0x01
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    bitrate = MP3_BITRATES[3 if version == 3 else 2][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][sample_rate_index]
+    samples = 1152 if version == 3 else 576
+    length = samples // 8 * bitrate // sample_rate + padding
+    return length, samples, sample_rate
+
+
+def id3v2_size(data):
+    """Size of a leading ID3v2 tag, or 0"""
+    if len(data) < 10 or data[:3] != b'ID3':
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def build_seek_index(audio_path, interval):
+    """
+    Walk the MP3 frame headers and return (byte offsets, duration in seconds).
+
+    offsets[i] is the position of the first frame starting at or after
+    i * interval seconds, so a player can seek with one range request.
+    """
+    offsets = array('I')
+    elapsed = 0.0
+    size = os.path.getsize(audio_path)
+    if size == 0:
+        return offsets, elapsed
+
+    with open(audio_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        position = id3v2_size(data[:10])
+        next_mark = 0.0
+        while position + 4 <= size:
+            frame = parse_frame_header(data[position:position + 4])
+            if frame is None:
+                # Resynchronise on the next possible frame start
+                position = data.find(b'\xff', position + 1)
+                if position < 0:
+                    break
+                continue
+
+            length, samples, sample_rate = frame
+            if elapsed >= next_mark:
+                offsets.append(position)
+                next_mark += interval
+            elapsed += samples / sample_rate
+            position += length
+
+    return offsets, elapsed
+
+
+def write_sidecar(audio_path, sidecar_path):
+    """Compute waveform peaks and the seek index of an MP3 and write them to a sidecar file"""
+    peaks_per_second = settings.WAVEFORM_PEAKS_PER_SECOND
+    interval = settings.WAVEFORM_SEEK_INTERVAL
+
+    peaks = compute_peaks(audio_path, peaks_per_second)
+    offsets, duration = build_seek_index(audio_path, interval)
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+
+    header = SIDECAR_HEADER.pack(
+        SIDECAR_MAGIC,
+        SIDECAR_VERSION,
+        peaks_per_second,
+        interval,
+        int(duration * 1000),
+        len(peaks) // 2,
+        len(offsets)
+    )
+    tmp_path = sidecar_path.with_suffix('.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        peaks.tofile(f)
+        offsets.tofile(f)
+    os.replace(tmp_path, sidecar_path)
+
+    logger.info(
+        f"Wrote waveform sidecar {sidecar_path}: {len(peaks) // 2} peaks, {len(offsets)} seek points"
+    )
+    return sidecar_path
+
+
+def drop_seek_index(sidecar_path):
+    """
+    Remove the MP3 seek index from a sidecar, keeping the waveform peaks.
+
+    Used when the audio is re-encoded: the byte offsets no longer match, while
+    the peaks of the same audio still do.
+    """
+    with open(sidecar_path, 'rb') as f:
+        header = SIDECAR_HEADER.unpack(f.read(SIDECAR_HEADER.size))
+        peaks = f.read(2 * header[5])
+    magic, version, peaks_per_second, interval, duration_ms, peak_pairs, _ = header
+
+    tmp_path = sidecar_path.with_suffix('.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(SIDECAR_HEADER.pack(magic, version, peaks_per_second, interval, duration_ms, peak_pairs, 0))
+        f.write(peaks)
+    os.replace(tmp_path, sidecar_path)
@@ -0,0 +1,94 @@
+import hashlib
+import hmac
+import logging
+import secrets
+import xml.etree.ElementTree as ET
+
+import requests
+from django.conf import settings
+from django.urls import reverse
+
+logger = logging.getLogger(__name__)
+
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+YT_NS = '{http://www.youtube.com/xml/schemas/2015}'
+TOMBSTONE_NS = '{http://purl.org/atompub/tombstones/1.0}'
+MAX_LEASE_SECONDS = 365 * 24 * 3600
+
+
+def new_secret():
+    return secrets.token_hex(32)
+
+
+def callback_url(channel):
+    return settings.WEBSUB_CALLBACK_BASE_URL.rstrip('/') + reverse('websub_callback', args=[channel.id])
+
+
+def request_subscription(subscription, mode='subscribe'):
+    """
+    Ask the hub to (un)subscribe our callback to a channel feed.
+
+    The hub confirms asynchronously with a GET to the callback.
+    """
+    response = requests.post(
+        settings.WEBSUB_HUB_URL,
+        data={
+            'hub.callback': callback_url(subscription.channel),
+            'hub.topic': subscription.topic,
+            'hub.mode': mode,
+            'hub.verify': 'async',
+            'hub.secret': subscription.secret,
+            'hub.lease_seconds': settings.WEBSUB_LEASE_SECONDS,
+        },
+        timeout=10
+    )
+    response.raise_for_status()
+
+
+def parse_lease_seconds(value):
+    """
+    Lease granted by the hub in a verification request
+
+    The request is unauthenticated, so anything that is not a positive number
+    of seconds below a year falls back to the lease we asked for.
+    """
+    try:
+        lease_seconds = int(value)
+    except (TypeError, ValueError):
+        return settings.WEBSUB_LEASE_SECONDS
+    if not 0 < lease_seconds <= MAX_LEASE_SECONDS:
+        return settings.WEBSUB_LEASE_SECONDS
+    return lease_seconds
+
+
+def verify_signature(secret, body, header):
+    """Check the X-Hub-Signature header (`sha1=<hexdigest>`) of a notification"""
+    if not header or '=' not in header:
+        return False
+    algorithm, signature = header.split('=', 1)
+    if algorithm not in ('sha1', 'sha256', 'sha512'):
+        return False
+    expected = hmac.new(secret.encode(), body, getattr(hashlib, algorithm)).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def parse_notification(body):
+    """
+    Parse a YouTube feed push notification.
+
+    Returns a list of (video_id, channel_id) for published or updated videos.
+    Deleted entries are ignored.
+    """
+    try:
+        root = ET.fromstring(body)
+    except ET.ParseError as e:
+        logger.warning(f"Malformed WebSub notification: {str(e)}")
+        return []
+
+    videos = []
+    for entry in root.iter(f'{ATOM_NS}entry'):
+        video_id = entry.findtext(f'{YT_NS}videoId')
+        channel_id = entry.findtext(f'{YT_NS}channelId')
+        if video_id and channel_id:
+            videos.append((video_id, channel_id))
+    return videos
@@ -1,4 +1,5 @@
 import os
+import socket
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -11,6 +12,7 @@ SECRET_KEY = os.getenv('SECRET_KEY', 'django-insecure-default-key')
 DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
 
 ALLOWED_HOSTS = ['localhost', '127.0.0.1', '0.0.0.0']
+ALLOWED_HOSTS += [host for host in os.getenv('EXTRA_ALLOWED_HOSTS', '').split(',') if host]
 
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -97,13 +99,129 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Redis (locks and shared state)
+REDIS_URL = os.getenv('REDIS_URL', CELERY_BROKER_URL)
+CHANNEL_CHECK_LOCK_TIMEOUT = int(os.getenv('CHANNEL_CHECK_LOCK_TIMEOUT', 300))
+STREAM_LOCK_TIMEOUT = int(os.getenv('STREAM_LOCK_TIMEOUT', 60))
+
+# Prometheus metrics
+METRICS_CELERY_QUEUES = os.getenv('METRICS_CELERY_QUEUES', 'celery').split(',')
+# Parent of the per-container PROMETHEUS_MULTIPROC_DIRs; /metrics merges the samples of all of them
+METRICS_MULTIPROC_ROOT = os.getenv('METRICS_MULTIPROC_ROOT')
+
 # YouTube API
 YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY')
+# Comma-separated pool of keys (one per Google Cloud project); falls back to YOUTUBE_API_KEY
+YOUTUBE_API_KEYS = [
+    key.strip() for key in (os.getenv('YOUTUBE_API_KEYS') or YOUTUBE_API_KEY or '').split(',') if key.strip()
+]
+# Per-key token bucket: sustained requests per second and burst size
+YOUTUBE_KEY_RATE = float(os.getenv('YOUTUBE_KEY_RATE', 5))
+YOUTUBE_KEY_BURST = int(os.getenv('YOUTUBE_KEY_BURST', 10))
+YOUTUBE_KEY_MAX_WAIT = float(os.getenv('YOUTUBE_KEY_MAX_WAIT', 5))
+# Daily quota of each key in the pool
+YOUTUBE_DAILY_QUOTA = int(os.getenv('YOUTUBE_DAILY_QUOTA', 10000))
+# Units kept back from routine polling for recording-critical calls
+YOUTUBE_QUOTA_RESERVE = int(os.getenv('YOUTUBE_QUOTA_RESERVE', 1000))
+MIN_CHANNEL_POLL_INTERVAL = int(os.getenv('MIN_CHANNEL_POLL_INTERVAL', 60))
+# Concurrent API calls of `manage.py check_channels --inline`
+INLINE_SWEEP_WORKERS = int(os.getenv('INLINE_SWEEP_WORKERS', 8))
+CHANNEL_STATS_REFRESH_HOURS = int(os.getenv('CHANNEL_STATS_REFRESH_HOURS', 6))
+# Channel statistics history keeps minute samples for this many hours and hourly ones for this many days
+CHANNEL_HISTORY_MINUTE_RETENTION_HOURS = int(os.getenv('CHANNEL_HISTORY_MINUTE_RETENTION_HOURS', 48))
+CHANNEL_HISTORY_HOUR_RETENTION_DAYS = int(os.getenv('CHANNEL_HISTORY_HOUR_RETENTION_DAYS', 90))
+CHANNEL_STATS_ETAG_TTL = 7 * 24 * 3600
+# The cached home page summary is rebuilt from the database at least this often, since bulk
+# updates of streams bypass the signals that keep it current
+CHANNEL_SUMMARY_TTL = int(os.getenv('CHANNEL_SUMMARY_TTL', 300))
+# Alternative API root, e.g. the local stand-in from benchmarks/fake_youtube.py
+YOUTUBE_API_ENDPOINT = os.getenv('YOUTUBE_API_ENDPOINT')
+
+# WebSub (PubSubHubbub) push notifications of channel feeds
+WEBSUB_ENABLED = os.getenv('WEBSUB_ENABLED', 'False').lower() == 'true'
+WEBSUB_HUB_URL = os.getenv('WEBSUB_HUB_URL', 'https://pubsubhubbub.appspot.com/subscribe')
+# Public base URL of this site that the hub can reach, e.g. https://trap.example.com
+WEBSUB_CALLBACK_BASE_URL = os.getenv('WEBSUB_CALLBACK_BASE_URL', 'http://localhost:8000')
+WEBSUB_LEASE_SECONDS = int(os.getenv('WEBSUB_LEASE_SECONDS', 5 * 24 * 3600))
+WEBSUB_RENEW_BEFORE = 24 * 3600
+# Upcoming streams announced by a notification are re-checked until they start
+WEBSUB_UPCOMING_RECHECKS = 12
+WEBSUB_UPCOMING_RECHECK_INTERVAL = 300
+# With push notifications on, polling is only a slow safety net
+WEBSUB_SAFETY_SWEEP_INTERVAL = int(os.getenv('WEBSUB_SAFETY_SWEEP_INTERVAL', 3600))
+
+# Recorder nodes: each Celery worker advertises its capacity and consumes its own queue
+RECORDER_NODE_NAME = os.getenv('RECORDER_NODE_NAME', socket.gethostname())
+RECORDER_HEARTBEAT_INTERVAL = int(os.getenv('RECORDER_HEARTBEAT_INTERVAL', 10))
+RECORDER_MAX_RECORDINGS = int(os.getenv('RECORDER_MAX_RECORDINGS', 10))
+RECORDER_MIN_FREE_DISK_GB = int(os.getenv('RECORDER_MIN_FREE_DISK_GB', 5))
+RECORDER_LINK_CAPACITY_MBPS = int(os.getenv('RECORDER_LINK_CAPACITY_MBPS', 100))
+# Share of the link recordings may use; the rest is headroom against fragment loss
+RECORDER_LINK_UTILIZATION = float(os.getenv('RECORDER_LINK_UTILIZATION', 0.8))
+# Interface whose traffic is measured; by default all but loopback
+RECORDER_NETWORK_INTERFACE = os.getenv('RECORDER_NETWORK_INTERFACE')
+# Draining nodes hand their recordings off: the replacement must start capturing within the timeout,
+# then both capture for the overlap before the old capture stops
+RECORDER_HANDOFF_TIMEOUT = int(os.getenv('RECORDER_HANDOFF_TIMEOUT', 120))
+RECORDER_HANDOFF_OVERLAP = int(os.getenv('RECORDER_HANDOFF_OVERLAP', 30))
+
+# Admission control of concurrent recordings across all nodes
+MAX_CONCURRENT_RECORDINGS = int(os.getenv('MAX_CONCURRENT_RECORDINGS', 20))
+# Slots only high priority channels may take
+RECORDING_HIGH_PRIORITY_RESERVE = int(os.getenv('RECORDING_HIGH_PRIORITY_RESERVE', 4))
+# Share of slots in use above which lower priority streams are recorded audio-only
+RECORDING_DEGRADE_THRESHOLD = float(os.getenv('RECORDING_DEGRADE_THRESHOLD', 0.75))
+
+# Failed recording attempts are retried with exponential backoff while the stream is live
+RECORDING_MAX_ATTEMPTS = int(os.getenv('RECORDING_MAX_ATTEMPTS', 6))
+RECORDING_RETRY_BASE_DELAY = 5
+RECORDING_RETRY_MAX_DELAY = 300
+
+# External tools
+YTARCHIVE_BIN = os.getenv('YTARCHIVE_BIN', 'ytarchive')
+FFMPEG_BIN = os.getenv('FFMPEG_BIN', 'ffmpeg')
 
 # Application settings
 RECORDINGS_DIR = MEDIA_ROOT / 'recordings'
 TEMP_DIR = MEDIA_ROOT / 'temp'
 
+# Channel thumbnails cached as WebP (1x and 2x of THUMBNAIL_SIZE pixels)
+THUMBNAIL_SIZE = int(os.getenv('THUMBNAIL_SIZE', 44))
+THUMBNAIL_WEBP_QUALITY = 80
+THUMBNAIL_FETCH_TIMEOUT = 10
+THUMBNAIL_CACHE_MAX_AGE = 365 * 24 * 3600
+
+# Waveform sidecar of recordings: min/max peaks per second and seek index step in seconds
+WAVEFORM_PEAKS_PER_SECOND = int(os.getenv('WAVEFORM_PEAKS_PER_SECOND', 10))
+WAVEFORM_SEEK_INTERVAL = int(os.getenv('WAVEFORM_SEEK_INTERVAL', 1))
+
+# Rolling audio-only HLS of recordings in progress, served from MEDIA_URL/live/<recording id>/
+LIVE_HLS_ENABLED = os.getenv('LIVE_HLS_ENABLED', 'False').lower() == 'true'
+LIVE_HLS_SEGMENT_SECONDS = int(os.getenv('LIVE_HLS_SEGMENT_SECONDS', 4))
+LIVE_HLS_LIST_SIZE = int(os.getenv('LIVE_HLS_LIST_SIZE', 15))
+LIVE_HLS_START_TIMEOUT = 300
+
+# Storage tiers, off by default: recordings older than this many days (0 = never) are re-encoded to
+# low-bitrate Opus for speech and/or moved to recordings/archive under MEDIA_ROOT, where cheaper storage
+# can be mounted. Archiving is lossy and changes the file URLs, so it has to be enabled explicitly
+STORAGE_TIER_AFTER_DAYS = int(os.getenv('STORAGE_TIER_AFTER_DAYS', 0))
+STORAGE_TIER_REENCODE = os.getenv('STORAGE_TIER_REENCODE', 'True').lower() == 'true'
+STORAGE_TIER_MOVE = os.getenv('STORAGE_TIER_MOVE', 'False').lower() == 'true'
+STORAGE_TIER_OPUS_BITRATE = os.getenv('STORAGE_TIER_OPUS_BITRATE', '24k')
+# Recordings archived per hourly run
+STORAGE_TIER_BATCH = int(os.getenv('STORAGE_TIER_BATCH', 20))
+
+# Admin changelists show planner estimates instead of COUNT(*) above this many rows (PostgreSQL only)
+ADMIN_EXACT_COUNT_LIMIT = int(os.getenv('ADMIN_EXACT_COUNT_LIMIT', 100000))
+
+# Default and longest window of the stream lifecycle latency report
+STREAM_LATENCY_WINDOW_DAYS = 7
+STREAM_LATENCY_MAX_DAYS = 365
+
+# Full-text search results per request; the admin takes more and paginates them
+SEARCH_RESULTS_LIMIT = 50
+ADMIN_SEARCH_RESULTS_LIMIT = 1000
+
 # Create necessary directories
 RECORDINGS_DIR.mkdir(parents=True, exist_ok=True)
 TEMP_DIR.mkdir(parents=True, exist_ok=True)
\ No newline at end of file